@@ -0,0 +1,100 @@
+"""compact email key
+
+Revision ID: 3c1d9a7b5e42
+Revises: f955535ef4a0
+Create Date: 2026-10-19 10:12:41.318204
+
+Добавляет rating_records.email_key — 16-байтовый BLAKE2b email — и
+покрывающий индекс (email_key) INCLUDE (value), а также удаляет избыточный
+ix_rating_records_id (id уже покрыт первичным ключом).
+
+Миграция онлайн: колонка добавляется без перезаписи таблицы, ключи
+заполняются пачками в отдельных транзакциях, индексы создаются и удаляются
+CONCURRENTLY.
+"""
+
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1d9a7b5e42"
+down_revision: Union[str, None] = "f955535ef4a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def email_lookup_key(email: str) -> bytes:
+    # Копия app.services.db.schemas.email_lookup_key на момент миграции
+    return hashlib.blake2b(email.encode(), digest_size=16).digest()
+
+
+def backfill_email_keys() -> None:
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, email FROM rating_records "
+                "WHERE id > :last_id AND email_key IS NULL "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        conn.execute(
+            sa.text("UPDATE rating_records SET email_key = :key WHERE id = :id"),
+            [{"id": row.id, "key": email_lookup_key(row.email)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "rating_records",
+        sa.Column("email_key", sa.LargeBinary(length=16), nullable=True),
+    )
+
+    # Вне общей транзакции миграции: каждая пачка коммитится сразу,
+    # а CREATE/DROP INDEX CONCURRENTLY внутри транзакции невозможны.
+    with op.get_context().autocommit_block():
+        backfill_email_keys()
+        op.create_index(
+            "ix_rating_records_email_key",
+            "rating_records",
+            ["email_key"],
+            unique=False,
+            postgresql_include=["value"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_id",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_rating_records_id",
+            "rating_records",
+            ["id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_email_key",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("rating_records", "email_key")
@@ -0,0 +1,128 @@
+"""unique email key
+
+Revision ID: 5e9c2d4b7a13
+Revises: 8b2f4e6a1c07
+Create Date: 2026-10-19 13:21:37.604118
+
+Делает email_key уникальным: оценка сохраняется через
+INSERT ... ON CONFLICT (email_key) DO UPDATE, и одновременные первые
+отправки не создают дубликатов. Перед построением индекса:
+
+- email_key пересчитывается по email без нормализации регистра и пробелов
+  (3c1d9a7b5e42 в ранних версиях нормализовал email; пересчитываются только
+  строки, где нормализация могла дать другой ключ);
+- дозаполняются пустые email_key;
+- удаляются дубликаты по email_key (остаётся запись с наибольшим id).
+
+Все шаги идут пачками по диапазонам id в отдельных транзакциях.
+
+Уникальный индекс строится CONCURRENTLY. Если между удалением дубликатов
+и построением индекса старая версия сервиса успела вставить дубликат,
+CREATE INDEX завершится ошибкой и оставит невалидный индекс: его нужно
+удалить (DROP INDEX CONCURRENTLY uq_rating_records_email_key) и повторить
+миграцию.
+"""
+
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e9c2d4b7a13"
+down_revision: Union[str, None] = "8b2f4e6a1c07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def email_lookup_key(email: str) -> bytes:
+    # Копия app.services.db.schemas.email_lookup_key на момент миграции
+    return hashlib.blake2b(email.encode(), digest_size=16).digest()
+
+
+def update_email_keys(condition: str) -> None:
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, email FROM rating_records "
+                f"WHERE id > :last_id AND ({condition}) "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        conn.execute(
+            sa.text("UPDATE rating_records SET email_key = :key WHERE id = :id"),
+            [{"id": row.id, "key": email_lookup_key(row.email)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def delete_duplicates() -> None:
+    conn = op.get_bind()
+    max_id = conn.execute(sa.text("SELECT MAX(id) FROM rating_records")).scalar()
+    if max_id is None:
+        return
+
+    # Удаляется запись, у которой есть более новая с тем же ключом;
+    # подзапрос идёт по индексу ix_rating_records_email_key
+    for low in range(0, max_id + 1, BATCH_SIZE):
+        conn.execute(
+            sa.text(
+                "DELETE FROM rating_records "
+                "WHERE id >= :low AND id < :high AND email_key IS NOT NULL "
+                "AND EXISTS ("
+                "SELECT 1 FROM rating_records newer "
+                "WHERE newer.email_key = rating_records.email_key "
+                "AND newer.id > rating_records.id"
+                ")"
+            ),
+            {"low": low, "high": low + BATCH_SIZE},
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        update_email_keys("email <> LOWER(TRIM(email))")
+        update_email_keys("email_key IS NULL")
+        delete_duplicates()
+        op.create_index(
+            "uq_rating_records_email_key",
+            "rating_records",
+            ["email_key"],
+            unique=True,
+            postgresql_include=["value"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_email_key",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_rating_records_email_key",
+            "rating_records",
+            ["email_key"],
+            unique=False,
+            postgresql_include=["value"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "uq_rating_records_email_key",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
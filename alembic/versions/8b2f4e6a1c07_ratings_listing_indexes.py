@@ -0,0 +1,70 @@
+"""ratings listing indexes
+
+Revision ID: 8b2f4e6a1c07
+Revises: 3c1d9a7b5e42
+Create Date: 2026-10-19 11:04:09.521873
+
+Индексы для админского списка оценок с курсорной пагинацией по id:
+ix_rating_records_email заменяется на индекс с text_pattern_ops, который
+обслуживает и поиск по равенству, и по префиксу email; для фильтра по
+диапазону оценок добавляется (value, id). Все индексы создаются и
+удаляются CONCURRENTLY.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2f4e6a1c07"
+down_revision: Union[str, None] = "3c1d9a7b5e42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_rating_records_email_pattern",
+            "rating_records",
+            ["email"],
+            unique=False,
+            postgresql_ops={"email": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_rating_records_value_id",
+            "rating_records",
+            ["value", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_email",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_rating_records_email",
+            "rating_records",
+            ["email"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_value_id",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_email_pattern",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,59 @@
+"""email id index
+
+Revision ID: d4a7c2e9f318
+Revises: 5e9c2d4b7a13
+Create Date: 2026-10-19 16:42:05.318604
+
+ix_rating_records_email_pattern заменяется на (email text_pattern_ops, id):
+индекс по-прежнему обслуживает поиск по равенству и префиксу email, а
+страницы админского списка с фильтром по префиксу читаются из него в
+порядке (email, id) без сортировки. Индексы создаются и удаляются
+CONCURRENTLY.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a7c2e9f318"
+down_revision: Union[str, None] = "5e9c2d4b7a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_rating_records_email_id",
+            "rating_records",
+            ["email", "id"],
+            unique=False,
+            postgresql_ops={"email": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_email_pattern",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_rating_records_email_pattern",
+            "rating_records",
+            ["email"],
+            unique=False,
+            postgresql_ops={"email": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_rating_records_email_id",
+            table_name="rating_records",
+            postgresql_concurrently=True,
+        )
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, status
 from fastapi.responses import HTMLResponse
 
+from app.services.health import readiness_probe
+from app.services.serialization import FastJSONResponse
 from app.settings import settings
 
 root_router = APIRouter(
@@ -10,7 +12,7 @@ root_router = APIRouter(
 
 
 @root_router.get("/", status_code=200, name="root")
-def get_root():
+async def get_root():
     content = f"""
         <html>
         <head><title>{settings.APP_TITLE}</title></head>
@@ -34,5 +36,19 @@ def get_root():
 
 
 @root_router.get("/status", status_code=200, name="status")
-def get_health():
+async def get_health():
     return "ok"
+
+
+@root_router.get("/health/live", status_code=200, name="liveness")
+async def get_liveness():
+    return {"status": "ok"}
+
+
+@root_router.get("/health/ready", status_code=200, name="readiness")
+async def get_readiness():
+    ready, checks = await readiness_probe.check()
+    return FastJSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ok" if ready else "unavailable", "checks": checks},
+    )
@@ -0,0 +1,78 @@
+import asyncio
+import datetime
+from enum import Enum
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.services.auth import get_admin_user
+from app.services.profiling import capture_cpu_profile, capture_loop_stalls
+from app.settings import settings, security
+
+api_v1_admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Одновременно в процессе снимается не больше одного профиля
+profiling_lock = asyncio.Lock()
+
+
+class ProfileMode(str, Enum):
+    CPU = "cpu"
+    LOOP = "loop"
+
+
+@api_v1_admin_router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Снять профиль процесса",
+)
+async def get_profile(
+    seconds: float = Query(10, gt=0),
+    mode: ProfileMode = ProfileMode.CPU,
+    token=Depends(security),
+    admin=Depends(get_admin_user),
+):
+    """
+    Снимает сэмплирующий профиль текущего воркера на seconds секунд и отдаёт его
+    в формате collapsed stacks (flamegraph.pl, speedscope, Pyroscope).
+
+    - cpu — стеки всех потоков процесса, кроме простаивающих: поток, не
+      потративший процессорного времени с прошлого снимка, не учитывается;
+    - loop — стеки потока event loop только в моменты, когда цикл заблокирован
+      дольше PROFILING_LOOP_STALL_THRESHOLD.
+
+    Доступно только администраторам и только при PROFILING_ENABLED.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Профилирование выключено"
+        )
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Длительность не может превышать {settings.PROFILING_MAX_SECONDS} с",
+        )
+    if profiling_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Профиль уже снимается"
+        )
+
+    async with profiling_lock:
+        if mode == ProfileMode.CPU:
+            folded = await capture_cpu_profile(
+                seconds, settings.PROFILING_SAMPLE_INTERVAL
+            )
+        else:
+            folded = await capture_loop_stalls(
+                seconds,
+                settings.PROFILING_LOOP_STALL_THRESHOLD,
+                settings.PROFILING_SAMPLE_INTERVAL,
+            )
+
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    return PlainTextResponse(
+        folded,
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{mode.value}-{stamp}.folded"'
+        },
+    )
@@ -1,13 +1,24 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import binascii
+import math
+from typing import Annotated, List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select, update, insert
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, bindparam, or_, select, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 
-from app.services.auth import get_current_user
-from app.services.db.db_session import get_session
-from app.services.db.schemas import RatingRecords
-from app.settings import security
+from app.services.auth import get_admin_user, get_current_user
+from app.services.db.db_session import LazySession, get_lazy_session
+from app.services.db.engine import db_engine
+from app.services.db.schemas import RatingRecords, email_lookup_key
+from app.services.rating_cache import (
+    etag_matches,
+    get_cached_rating,
+    invalidate_cached_rating_quietly,
+    make_rating_etag,
+    set_cached_rating,
+)
+from app.settings import settings, security
 
 api_v2_ratings_router = APIRouter(prefix="/ratings", tags=["ratings"])
 
@@ -20,20 +31,118 @@ class RatingOut(BaseModel):
     rating: float
 
 
+class RatingListItem(BaseModel):
+    id: int
+    email: str
+    rating: float
+
+
+class RatingPage(BaseModel):
+    items: List[RatingListItem]
+    next_cursor: str | None = None
+
+
+CURSOR_VERSION = "v2"
+
+# Порядок страниц списка оценок; курсор хранит его и позицию в нём
+ORDER_BY_ID = "id"
+ORDER_BY_VALUE = "value"
+ORDER_BY_EMAIL = "email"
+
+
+def encode_cursor(order: str, last_id: int, last_key: float | str | None = None) -> str:
+    """
+    Курсор — позиция последней записи страницы: id и, если порядок не по
+    id, значение ключа сортировки (оценка или email).
+    """
+    raw = f"{CURSOR_VERSION}:{order}:{last_id}"
+    if order == ORDER_BY_VALUE:
+        raw += f":{last_key!r}"
+    elif order == ORDER_BY_EMAIL:
+        raw += f":{last_key}"
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, order: str) -> tuple[int, float | str | None]:
+    """
+    Разбирает курсор, выданный для того же порядка order. Курсор другой
+    версии или порядка (например, после смены фильтров) даёт 400.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        # email может содержать ":", поэтому он всегда последний
+        version, cursor_order, *position = raw.split(":", 3)
+        if (
+            version != CURSOR_VERSION
+            or cursor_order != order
+            or len(position) != (1 if order == ORDER_BY_ID else 2)
+        ):
+            raise ValueError(raw)
+        last_id = int(position[0])
+        if order == ORDER_BY_ID:
+            return last_id, None
+        if order == ORDER_BY_EMAIL:
+            return last_id, position[1]
+        last_value = float(position[1])
+        if not math.isfinite(last_value):
+            raise ValueError(raw)
+        return last_id, last_value
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+        )
+
+
+def escape_like(value: str) -> str:
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def email_order():
+    """
+    Сортировка по email в порядке индекса text_pattern_ops (побайтово):
+    обычный ORDER BY email идёт по правилам локали и индекс не использует.
+    В SQLite строки и так сравниваются побайтово.
+    """
+    if db_engine.engine.dialect.name == "sqlite":
+        return RatingRecords.email
+    return text("rating_records.email USING ~<~")
+
+
+def email_after(last_email: str, last_id: int):
+    """
+    Условие "после (last_email, last_id)" в порядке email_order(). Первая
+    часть — граница диапазона, по которой Postgres читает индекс.
+    """
+    if db_engine.engine.dialect.name == "sqlite":
+        ge, gt = ">=", ">"
+    else:
+        ge, gt = "~>=~", "~>~"
+    email = RatingRecords.email
+    return and_(
+        email.op(ge)(last_email),
+        or_(email.op(gt)(last_email), RatingRecords.id > last_id),
+    )
+
+
 @api_v2_ratings_router.get(
     "/my",
     response_model=RatingOut,
     status_code=status.HTTP_200_OK,
     summary="Получить текущую оценку пользователя",
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Оценка не изменилась"}},
 )
 async def get_my_rating(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     token=Depends(security),
     user_data=Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: LazySession = Depends(get_lazy_session),
 ) -> RatingOut:
     """
     Возвращает текущую оценку (1–5) для залогиненного пользователя.
     Если пользователь ещё не голосовал, возвращает 404 Not Found.
+    Ответ снабжается ETag; при совпадении с If-None-Match возвращается
+    304 Not Modified. Оценка сначала ищется в Redis, и только при промахе — в БД.
     """
     if not user_data.email:
         raise HTTPException(
@@ -41,12 +150,29 @@ async def get_my_rating(
         )
 
     try:
-        stmt = select(RatingRecords).where(RatingRecords.email == user_data.email)
-        result = await session.execute(stmt)
-        record = result.scalar_one_or_none()
+        value = await get_cached_rating(user_data.email)
+
+        if value is None:
+            # только value: с ключом email_key это index-only scan
+            stmt = select(RatingRecords.value).where(
+                RatingRecords.owned_by(user_data.email)
+            )
+            result = await session.execute(stmt)
+            stored = result.scalar_one_or_none()
+            await session.release()
+            if stored is not None:
+                value = float(stored)
+                await set_cached_rating(user_data.email, value)
 
-        if record:
-            return RatingOut(rating=float(record.value))
+        if value is not None:
+            etag = make_rating_etag(value)
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if etag_matches(if_none_match, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+                )
+            response.headers.update(headers)
+            return RatingOut(rating=value)
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -70,13 +196,15 @@ async def submit_rating(
     payload: RatingIn,
     token=Depends(security),
     user_data=Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    session: LazySession = Depends(get_lazy_session),
 ) -> dict:
     """
     Принимает JSON {"rating": <float от 1 до 5>} и сохраняет или обновляет оценку
-    для текущего пользователя.
-    Если пользователь ещё не голосовал, создаётся новая запись.
+    для текущего пользователя одним INSERT ... ON CONFLICT (email_key) DO UPDATE:
+    одновременные первые отправки не создают дубликатов.
     В ответ возвращается {"message": "...", "rating": <текущее значение>}.
+    После коммита оценка удаляется из кэша Redis (без ошибки при недоступном
+    Redis); кэш заполняется заново при следующем чтении.
     """
     if not user_data.email:
         raise HTTPException(
@@ -84,33 +212,119 @@ async def submit_rating(
         )
 
     try:
-        stmt_select = select(RatingRecords).where(
-            RatingRecords.email == user_data.email
+        # SQLite — для бенчмарков и локального запуска
+        dialect = sqlite if db_engine.engine.dialect.name == "sqlite" else postgresql
+        stmt_upsert = dialect.insert(RatingRecords).values(
+            email=user_data.email,
+            email_key=email_lookup_key(user_data.email),
+            value=float(payload.rating),
         )
-        result = await session.execute(stmt_select)
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            stmt_update = (
-                update(RatingRecords)
-                .where(RatingRecords.email == user_data.email)
-                .values(value=float(payload.rating))
-            )
-            await session.execute(stmt_update)
-            message = "Оценка обновлена"
-        else:
-            stmt_insert = insert(RatingRecords).values(
-                email=user_data.email,
-                value=float(payload.rating),
-            )
-            await session.execute(stmt_insert)
-            message = "Оценка сохранена"
+        stmt_upsert = stmt_upsert.on_conflict_do_update(
+            index_elements=[RatingRecords.email_key],
+            set_={"value": stmt_upsert.excluded.value},
+        )
+        await session.execute(stmt_upsert)
 
         await session.commit()
-        return {"message": message, "rating": float(payload.rating)}
+        await session.release()
+        await invalidate_cached_rating_quietly(user_data.email)
+        return {"message": "Оценка сохранена", "rating": float(payload.rating)}
     except Exception as e:
         await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при сохранении оценки: {e}",
         )
+
+
+@api_v2_ratings_router.get(
+    "",
+    response_model=RatingPage,
+    status_code=status.HTTP_200_OK,
+    summary="Список оценок (для администраторов)",
+)
+async def list_ratings(
+    min_rating: Annotated[float | None, Query(ge=1, le=5)] = None,
+    max_rating: Annotated[float | None, Query(ge=1, le=5)] = None,
+    email_prefix: Annotated[str | None, Query(min_length=1)] = None,
+    limit: Annotated[
+        int, Query(ge=1, le=settings.RATINGS_PAGE_SIZE_MAX)
+    ] = settings.RATINGS_PAGE_SIZE_DEFAULT,
+    cursor: str | None = None,
+    token=Depends(security),
+    admin=Depends(get_admin_user),
+    session: LazySession = Depends(get_lazy_session),
+) -> RatingPage:
+    """
+    Возвращает оценки с фильтрами по диапазону оценки и префиксу email.
+    Пагинация курсорная (keyset): следующая страница запрашивается с
+    cursor=next_cursor из предыдущего ответа, и её стоимость не зависит от
+    того, насколько далеко пролистан список.
+
+    Порядок выбирается так, чтобы страница читалась из индекса без
+    сортировки всех подходящих записей:
+    - с фильтром по оценке — по (оценка, id), индекс (value, id);
+    - с префиксом email без фильтра по оценке — по (email, id), индекс
+      (email text_pattern_ops, id);
+    - иначе — по id (первичный ключ).
+    """
+    if min_rating is not None or max_rating is not None:
+        order = ORDER_BY_VALUE
+    elif email_prefix is not None:
+        order = ORDER_BY_EMAIL
+    else:
+        order = ORDER_BY_ID
+
+    stmt = select(RatingRecords.id, RatingRecords.email, RatingRecords.value).limit(
+        limit + 1
+    )
+    if order == ORDER_BY_VALUE:
+        stmt = stmt.order_by(RatingRecords.value, RatingRecords.id)
+    elif order == ORDER_BY_EMAIL:
+        stmt = stmt.order_by(email_order(), RatingRecords.id)
+    else:
+        stmt = stmt.order_by(RatingRecords.id)
+
+    if cursor is not None:
+        last_id, last_key = decode_cursor(cursor, order)
+        if order == ORDER_BY_VALUE:
+            stmt = stmt.where(
+                tuple_(RatingRecords.value, RatingRecords.id)
+                > tuple_(last_key, last_id)
+            )
+        elif order == ORDER_BY_EMAIL:
+            stmt = stmt.where(email_after(last_key, last_id))
+        else:
+            stmt = stmt.where(RatingRecords.id > last_id)
+    if min_rating is not None:
+        stmt = stmt.where(RatingRecords.value >= min_rating)
+    if max_rating is not None:
+        stmt = stmt.where(RatingRecords.value <= max_rating)
+    if email_prefix is not None:
+        # Шаблон подставляется литералом, чтобы планировщик Postgres мог
+        # использовать индекс text_pattern_ops для LIKE 'prefix%'
+        pattern = bindparam(
+            "email_pattern", escape_like(email_prefix) + "%", literal_execute=True
+        )
+        stmt = stmt.where(RatingRecords.email.like(pattern, escape="/"))
+
+    try:
+        result = await session.execute(stmt)
+        rows = result.all()
+        await session.release()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при получении списка оценок: {e}",
+        )
+
+    items = [
+        RatingListItem(id=row.id, email=row.email, rating=float(row.value))
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        last_key = {ORDER_BY_VALUE: last.rating, ORDER_BY_EMAIL: last.email}
+        next_cursor = encode_cursor(order, last.id, last_key.get(order))
+    return RatingPage(items=items, next_cursor=next_cursor)
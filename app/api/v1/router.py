@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from .rating import api_v2_ratings_router
+from .admin import api_v1_admin_router
 
 
 api_v1_router = APIRouter(prefix="/api/v1")
 api_v1_router.include_router(api_v2_ratings_router, tags=["ratings"])
+api_v1_router.include_router(api_v1_admin_router, tags=["admin"])
@@ -1,14 +1,18 @@
 import logging
 import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Set
 
 from prometheus_fastapi_instrumentator import Instrumentator
 
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, WebSocket
 from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.settings import settings, app_logger
+from app.settings import settings, app_logger, listener, queue_handler
 from app.api.root import root_router
 from app.api.v1.router import api_v1_router
 
@@ -17,8 +21,19 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.settings import google_fitness_api_user_clients, google_health_api_user_clients
 from app.services.redisClient import redis_client_async
-
-from app.services.utils import PrometheusMiddleware, metrics, setting_otlp
+from app.services.auth import close_auth_client
+from app.services.db.engine import db_engine
+from app.services.supervisor import supervisor
+from app.services.loop_monitor import loop_lag_monitor
+from app.services.serialization import FastJSONResponse
+from app.services.compression import CompressionMiddleware
+
+from app.services.utils import (
+    PrometheusMiddleware,
+    mark_metrics_process_dead,
+    metrics,
+    setting_otlp,
+)
 
 
 
@@ -41,7 +56,104 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     return token
 
 
+async def broadcast_progress_once(
+    namespace: str,
+    clients: dict[str, Set[WebSocket]],
+):
+    """
+    Один проход рассылки: отправляет подписанным сокетам прогресс сбора
+    данных из Redis и отписывает сокеты, отправка в которые не удалась.
+    Прогресс всех подписчиков читается одним MGET.
+    """
+    emails = list(clients)
+    if not emails:
+        return
+
+    payloads = await redis_client_async.mget(
+        [f"{namespace}{email}" for email in emails]
+    )
+    for email, payload in zip(emails, payloads):
+        if payload:
+            for sock in list(clients[email]):
+                try:
+                    await sock.send_text(payload)
+                except Exception:
+                    clients[email].discard(sock)
+
+
+async def broadcast_progress(
+    namespace: str,
+    clients: dict[str, Set[WebSocket]],
+    stop: asyncio.Event,
+):
+    """
+    Раз в секунду рассылает прогресс сбора данных. Текущая рассылка всегда
+    доводится до конца, после чего цикл завершается, если выставлено событие stop.
+    """
+    while not stop.is_set():
+        await broadcast_progress_once(namespace, clients)
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def close_websockets():
+    for clients in (google_fitness_api_user_clients, google_health_api_user_clients):
+        for socks in clients.values():
+            for sock in list(socks):
+                try:
+                    await sock.close(code=1001)
+                except Exception:
+                    pass
+        clients.clear()
+
+
+supervisor.add(
+    "broadcast_fitness_api_progress",
+    partial(
+        broadcast_progress,
+        settings.REDIS_DATA_COLLECTION_GOOGLE_FITNESS_API_PROGRESS_BAR_NAMESPACE,
+        google_fitness_api_user_clients,
+    ),
+)
+supervisor.add(
+    "broadcast_health_api_progress",
+    partial(
+        broadcast_progress,
+        settings.REDIS_DATA_COLLECTION_GOOGLE_HEALTH_API_PROGRESS_BAR_NAMESPACE,
+        google_health_api_user_clients,
+    ),
+)
+
+supervisor.add("event_loop_lag_monitor", loop_lag_monitor.run)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener.start()
+    app_logger.addHandler(queue_handler)
+    await redis_client_async.connect()
+    supervisor.start()
+
+    yield
+
+    # HTTP-запросы uvicorn уже дождался; останавливаем рассылки и только
+    # потом закрываем Redis и пул БД, которыми они пользуются.
+    await supervisor.stop(settings.BACKGROUND_TASK_STOP_TIMEOUT)
+    await close_websockets()
+    await close_auth_client()
+    await redis_client_async.disconnect()
+    await db_engine.dispose()
+    mark_metrics_process_dead()
+    app_logger.removeHandler(queue_handler)
+    listener.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     root_path=settings.ROOT_PATH,
     title=settings.APP_TITLE,
     version=settings.APP_VERSION,
@@ -55,9 +167,23 @@ app = FastAPI(
     redoc_url=settings.APP_REDOC_URL,
     swagger_ui_oauth2_redirect_url=settings.APP_DOCS_URL + "/oauth2-redirect",
 )
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
 app.add_middleware(PrometheusMiddleware, app_name=settings.APP_TITLE)
 app.add_route("/metrics", metrics)
-setting_otlp(app, settings.APP_TITLE, settings.OTLP_GRPC_ENDPOINT)
+setting_otlp(
+    app,
+    settings.APP_TITLE,
+    settings.OTLP_GRPC_ENDPOINT,
+    slow_request_threshold=settings.SLOW_REQUEST_THRESHOLD,
+)
 
 
 @app.middleware("http")
@@ -77,24 +203,6 @@ async def log_requests(request: Request, call_next):
 # ).instrument(app)
 
 
-@app.on_event("startup")
-async def startup_event():
-    # instrumentator.expose(
-    #     app,
-    #     endpoint="/metrics",
-    #     include_in_schema=False,
-    #     tags=["root"],
-    # )
-
-    await redis_client_async.connect()
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-
-    await redis_client_async.disconnect()
-
-
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -108,42 +216,3 @@ if settings.BACKEND_CORS_ORIGINS:
 app.include_router(api_v1_router)
 app.include_router(root_router)
 
-
-async def broadcast_fitness_api_progress():
-    while True:
-        for email in google_fitness_api_user_clients:
-            google_fitness_api_payload = await redis_client_async.get(
-                f"{settings.REDIS_DATA_COLLECTION_GOOGLE_FITNESS_API_PROGRESS_BAR_NAMESPACE}{email}"
-            )
-
-            if google_fitness_api_payload:
-                for sock in google_fitness_api_user_clients[email]:
-                    try:
-                        await sock.send_text(google_fitness_api_payload)
-                    except Exception:
-                        google_fitness_api_user_clients[email].discard(email)
-
-        await asyncio.sleep(1)
-
-
-async def broadcast_health_api_progress():
-    while True:
-        for email in google_health_api_user_clients:
-            google_health_api_payload = await redis_client_async.get(
-                f"{settings.REDIS_DATA_COLLECTION_GOOGLE_HEALTH_API_PROGRESS_BAR_NAMESPACE}{email}"
-            )
-
-            if google_health_api_payload:
-                for sock in google_health_api_user_clients[email]:
-                    try:
-                        await sock.send_text(google_health_api_payload)
-                    except Exception:
-                        google_health_api_user_clients[email].discard(email)
-
-        await asyncio.sleep(1)
-
-
-@app.on_event("startup")
-async def start_broadcast_task():
-    asyncio.create_task(broadcast_fitness_api_progress())
-    asyncio.create_task(broadcast_health_api_progress())
@@ -1,25 +1,184 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from prometheus_client import Counter, Histogram
+
 from app.models.models import TokenData
+from app.services.circuit_breaker import CircuitBreaker
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+AUTH_API_REQUEST_DURATION = Histogram(
+    "auth_api_request_duration_seconds",
+    "Histogram of Auth API user info request time by outcome (in seconds)",
+    ["outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+AUTH_API_SHORT_CIRCUITED = Counter(
+    "auth_api_short_circuited_total",
+    "Total count of requests rejected or served from cache while the Auth API breaker was open",
+    ["result"],
+)
+
+auth_breaker = CircuitBreaker(
+    "auth_api",
+    failure_rate_threshold=settings.AUTH_API_BREAKER_FAILURE_RATE,
+    window=settings.AUTH_API_BREAKER_WINDOW,
+    min_calls=settings.AUTH_API_BREAKER_MIN_CALLS,
+    open_seconds=settings.AUTH_API_BREAKER_OPEN_SECONDS,
+    trial_timeout=settings.AUTH_API_TIMEOUT,
+)
+
+_client: ClientSession | None = None
+
+
+def get_auth_client() -> ClientSession:
+    """
+    Общая для процесса HTTP-сессия к Auth API: соединения переиспользуются
+    между запросами, а таймауты ограничивают время ожидания ответа.
+    """
+    global _client
+    if _client is None or _client.closed:
+        _client = ClientSession(
+            connector=TCPConnector(limit=settings.AUTH_API_POOL_SIZE),
+            timeout=ClientTimeout(
+                total=settings.AUTH_API_TIMEOUT,
+                connect=settings.AUTH_API_CONNECT_TIMEOUT,
+            ),
+        )
+    return _client
+
+
+async def close_auth_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+class IdentityCache:
+    """
+    LRU-кэш пользователей по хэшу токена с ограничением по времени жизни.
+    Используется, чтобы продолжать обслуживать уже известных пользователей,
+    пока Auth API недоступен.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[TokenData, float]] = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str) -> TokenData | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        user, expires_at = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return user
+
+    def set(self, key: str, user: TokenData) -> None:
+        self._items[key] = (user, time.monotonic() + self.ttl)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._items.pop(key, None)
+
+
+identity_cache = IdentityCache(
+    settings.AUTH_IDENTITY_CACHE_SIZE, settings.AUTH_IDENTITY_CACHE_TTL
+)
+
+
+class AuthApiUnavailable(Exception):
+    pass
+
+
+def _serve_degraded(key: str) -> TokenData:
+    user = identity_cache.get(key)
+    if user is not None:
+        AUTH_API_SHORT_CIRCUITED.labels(result="cached").inc()
+        return user
+
+    AUTH_API_SHORT_CIRCUITED.labels(result="rejected").inc()
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервис авторизации недоступен",
+        headers={"Retry-After": str(int(settings.AUTH_API_BREAKER_OPEN_SECONDS))},
+    )
+
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
     headers = {"Authorization": f"Bearer {token}", "accept": "application/json"}
     url = f"{settings.AUTH_API_URL}{settings.AUTH_API_USER_INFO_PATH}"
+    key = IdentityCache.key(token)
+
+    if not auth_breaker.allow_request():
+        return _serve_degraded(key)
 
-    async with ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
+    outcome = "success"
+    started = time.perf_counter()
+    try:
+        async with get_auth_client().get(url, headers=headers) as response:
+            if response.status >= 500:
+                raise AuthApiUnavailable(f"Auth API ответил {response.status}")
             if response.status != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Could not validate credentials",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            data = await response.json()
+                outcome = "unauthorized"
+            else:
+                data = await response.json()
+    except (ClientError, asyncio.TimeoutError, ValueError, AuthApiUnavailable) as e:
+        # ValueError — некорректный JSON в ответе
+        outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+        auth_breaker.record_failure()
+        logger.warning(f"Ошибка запроса к Auth API: {e!r}")
+        return _serve_degraded(key)
+    except BaseException:
+        # Отмена запроса (отключение клиента, остановка) ничего не говорит
+        # о здоровье Auth API, но пробный вызов half-open надо освободить
+        outcome = "cancelled"
+        auth_breaker.release_trial()
+        raise
+    finally:
+        AUTH_API_REQUEST_DURATION.labels(outcome=outcome).observe(
+            time.perf_counter() - started
+        )
+
+    auth_breaker.record_success()
+
+    if outcome == "unauthorized":
+        identity_cache.discard(key)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     user = TokenData.parse_obj(data)
+    identity_cache.set(key, user)
+    return user
+
+
+async def get_admin_user(user: TokenData = Depends(get_current_user)) -> TokenData:
+    if user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав",
+        )
     return user
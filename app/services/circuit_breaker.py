@@ -0,0 +1,104 @@
+import time
+from collections import deque
+
+from prometheus_client import Gauge
+
+CIRCUIT_BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state by name (0 - closed, 1 - half-open, 2 - open)",
+    ["name"],
+    # у каждого воркера свой размыкатель; показываем худшее состояние
+    multiprocess_mode="livemax",
+)
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи по доле ошибок в последних window вызовах.
+
+    - closed: вызовы проходят; если при минимум min_calls вызовах доля ошибок
+      достигает failure_rate_threshold, размыкатель открывается;
+    - open: вызовы отклоняются сразу, пока не пройдёт open_seconds;
+    - half-open: пропускается один пробный вызов; успех закрывает
+      размыкатель, ошибка снова открывает. Если исход пробного вызова не
+      записан за trial_timeout секунд, пропускается следующий пробный вызов.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half-open"
+    OPEN = "open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 10.0,
+        trial_timeout: float = 10.0,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.trial_timeout = trial_timeout
+        self._results: deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        CIRCUIT_BREAKER_STATE.labels(name=self.name).set(self._STATE_VALUES[state])
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self._set_state(self.HALF_OPEN)
+            self._trial_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            now = time.monotonic()
+            if self._trial_in_flight and now - self._trial_started_at < self.trial_timeout:
+                return False
+            self._trial_in_flight = True
+            self._trial_started_at = now
+
+        return True
+
+    def record_success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._results.clear()
+            self._trial_in_flight = False
+            self._set_state(self.CLOSED)
+        self._results.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+
+        self._results.append(False)
+        if len(self._results) >= self.min_calls:
+            failures = self._results.count(False)
+            if failures / len(self._results) >= self.failure_rate_threshold:
+                self._open()
+
+    def release_trial(self) -> None:
+        """
+        Вызов завершился без исхода (например, был отменён): в half-open
+        освобождает пробный вызов, не меняя состояния; в closed ничего не
+        записывает.
+        """
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._results.clear()
+        self._set_state(self.OPEN)
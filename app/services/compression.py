@@ -0,0 +1,245 @@
+import zlib
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings(
+    gzip_level: int, brotli_quality: int, zstd_level: int
+) -> dict[str, Callable]:
+    """
+    Доступные кодировки в порядке предпочтения сервера: brotli и zstd
+    используются, только если установлены соответствующие пакеты.
+    """
+    encodings = {}
+    if brotli is not None:
+        encodings["br"] = lambda: BrotliEncoder(brotli_quality)
+    if zstandard is not None:
+        encodings["zstd"] = lambda: ZstdEncoder(zstd_level)
+    encodings["gzip"] = lambda: GzipEncoder(gzip_level)
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, supported: list[str]) -> str | None:
+    """
+    Выбирает кодировку по Accept-Encoding с учётом q-значений; при равных
+    q побеждает та, что раньше в supported. q=0 запрещает кодировку.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Потоково сжимает ответы (brotli, zstd или gzip по Accept-Encoding).
+
+    Сжимаются только ответы с типом содержимого из content_types (элемент,
+    оканчивающийся на "/", задаёт префикс, например "text/") и телом не
+    меньше minimum_size байт: маленькие ответы вроде /ratings/my уходят как
+    есть. Для потоковых ответов в памяти держится не больше minimum_size байт
+    до решения о сжатии, дальше каждый кусок сжимается и отправляется сразу.
+    Ответы, у которых уже есть Content-Encoding, не трогаются.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        content_types: list[str] | None = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types or ["application/json", "text/"]
+        self.encoders = available_encodings(gzip_level, brotli_quality, zstd_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), list(self.encoders)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def is_compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if not content_type:
+            return False
+        for allowed in self.content_types:
+            if allowed.endswith("/"):
+                if content_type.startswith(allowed):
+                    return True
+            elif content_type == allowed:
+                return True
+        return False
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Message | None = None
+        self.buffer = bytearray()
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_length = headers.get("content-length")
+            if not self.middleware.is_compressible(headers) or (
+                content_length is not None
+                and int(content_length) < self.middleware.minimum_size
+            ):
+                self.passthrough = True
+                await self._send(message)
+                return
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            # pathsend, zerocopysend, trailers: если решение о сжатии ещё не
+            # принято, ответ уходит без сжатия, и заголовки — первыми
+            if self.encoder is None:
+                self.passthrough = True
+                await self._send(self.start_message)
+                if self.buffer:
+                    await self._send(
+                        {
+                            "type": "http.response.body",
+                            "body": bytes(self.buffer),
+                            "more_body": True,
+                        }
+                    )
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            self.buffer += body
+            if len(self.buffer) < self.middleware.minimum_size:
+                if more_body:
+                    return
+                # Весь ответ меньше порога: отправляем без сжатия
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(
+                    {"type": "http.response.body", "body": bytes(self.buffer)}
+                )
+                return
+
+            self.encoder = self.middleware.encoders[self.encoding]()
+            await self._send(self.compressed_start_message())
+            body, self.buffer = bytes(self.buffer), bytearray()
+
+        if more_body:
+            data = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            data = self.encoder.compress(body) + self.encoder.finish()
+        if data or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+    def compressed_start_message(self) -> Message:
+        headers = MutableHeaders(raw=list(self.start_message["headers"]))
+        del headers["content-length"]
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # Сжатое представление не совпадает побайтно с исходным
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+        return {**self.start_message, "headers": headers.raw}
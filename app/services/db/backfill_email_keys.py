@@ -0,0 +1,72 @@
+"""
+Заполняет rating_records.email_key для записей, где он ещё пуст, пачками
+по первичному ключу: каждая пачка — отдельная короткая транзакция, таблица
+не блокируется. Идемпотентно; запускать после выката версии, которая пишет
+email_key, и перед включением DB_EMAIL_KEY_LOOKUP:
+
+    python -m app.services.db.backfill_email_keys --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import bindparam, select, update
+
+from .engine import db_engine
+from .schemas import RatingRecords, email_lookup_key
+
+logger = logging.getLogger("database")
+
+
+async def backfill_email_keys(batch_size: int, pause: float = 0.0) -> int:
+    updated = 0
+    last_id = 0
+    stmt_update = (
+        update(RatingRecords.__table__)
+        .where(RatingRecords.__table__.c.id == bindparam("row_id"))
+        .values(email_key=bindparam("key"))
+    )
+
+    while True:
+        async with db_engine.create_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(RatingRecords.id, RatingRecords.email)
+                    .where(RatingRecords.id > last_id, RatingRecords.email_key.is_(None))
+                    .order_by(RatingRecords.id)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+
+                await session.execute(
+                    stmt_update,
+                    [{"row_id": row.id, "key": email_lookup_key(row.email)} for row in rows],
+                )
+
+        last_id = rows[-1].id
+        updated += len(rows)
+        logger.info(f"email_key заполнен для {updated} записей (id <= {last_id})")
+        if pause:
+            await asyncio.sleep(pause)
+
+    return updated
+
+
+async def main(batch_size: int, pause: float):
+    try:
+        updated = await backfill_email_keys(batch_size, pause)
+        print(f"Заполнено записей: {updated}")
+    finally:
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--pause", type=float, default=0.0, help="пауза между пачками, с")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.batch_size, args.pause))
@@ -1,3 +1,7 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.services.db.engine import db_engine
 
 
@@ -12,3 +16,49 @@ async def get_session():
 
     async with db_engine.create_session() as session:
         yield session
+
+
+class LazySession:
+    """
+    Обёртка над AsyncSession, которая создаёт сессию и берёт соединение из пула
+    только при первом обращении к БД. release() возвращает соединение в пул
+    сразу после последнего запроса, не дожидаясь конца обработки запроса.
+    """
+
+    def __init__(self):
+        self._session: AsyncSession | None = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = db_engine.create_session()
+        return self._session
+
+    async def execute(self, *args: Any, **kwargs: Any):
+        return await self.session.execute(*args, **kwargs)
+
+    async def commit(self):
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def release(self):
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+
+async def get_lazy_session():
+    """
+    Зависимость FastAPI: LazySession, которая не трогает пул, пока хэндлер
+    не выполнит первый запрос (например, если запрос не прошёл авторизацию
+    или ответ взят из кэша).
+    """
+    session = LazySession()
+    try:
+        yield session
+    finally:
+        await session.release()
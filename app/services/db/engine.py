@@ -1,6 +1,12 @@
 import logging
+import re
+import time
+from functools import lru_cache
 from typing import Any, Union, List
 
+from opentelemetry import trace
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
@@ -13,11 +19,67 @@ from .settings import settings
 
 logger = logging.getLogger("database")
 
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Histogram of database statement execution time by statement fingerprint (in seconds)",
+    ["operation", "fingerprint"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_CONNECTION_HOLD_TIME = Histogram(
+    "db_connection_hold_seconds",
+    "Histogram of time a connection stays checked out of the pool (in seconds)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_CONNECTIONS_CHECKED_OUT = Gauge(
+    "db_connections_checked_out",
+    "Gauge of connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_STATEMENT_ERRORS = Counter(
+    "db_statement_errors_total",
+    "Total count of failed database statements by statement fingerprint",
+    ["operation", "fingerprint"],
+)
+
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def statement_fingerprint(statement: str) -> str:
+    """
+    Нормализованный текст запроса без параметров и литералов: запросы,
+    отличающиеся только значениями, получают один и тот же отпечаток.
+    """
+    fingerprint = _PLACEHOLDERS.sub("?", statement)
+    fingerprint = _LITERALS.sub("?", fingerprint)
+    fingerprint = _VALUE_LISTS.sub("(?)", fingerprint)
+    return _SPACES.sub(" ", fingerprint).strip()[:200]
+
+
+def statement_operation(statement: str) -> str:
+    return statement.lstrip().split(" ", 1)[0].upper()
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> str:
+    """
+    Описание параметров запроса без значений (в них могут быть email и т.п.).
+    """
+    if executemany:
+        return f"<{len(parameters)} наборов параметров>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: ?" for key in parameters) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join("?" for _ in parameters) + ")"
+    return "?"
+
 
 class AsyncDbEngine:
     def __init__(self):
 
-        self.url = (
+        self.url = settings.DB_URL or (
             f"{settings.DB_ENGINE}+asyncpg://"
             f"{settings.DB_USER}:{settings.DB_PASSWORD}"
             f"@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
@@ -28,12 +90,79 @@ class AsyncDbEngine:
             pool_pre_ping=True,
         )
 
+        sync_engine = self.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+
         self._session_factory = sessionmaker(
             bind=self.engine,
             class_=AsyncSession,
             expire_on_commit=False,
         )
 
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        fingerprint = statement_fingerprint(statement)
+        operation = statement_operation(statement)
+
+        DB_STATEMENT_DURATION.labels(
+            operation=operation, fingerprint=fingerprint
+        ).observe(duration)
+
+        span = trace.get_current_span()
+        if span.is_recording():
+            span.add_event(
+                "db.statement",
+                {
+                    "db.operation": operation,
+                    "db.statement": fingerprint,
+                    "db.duration_ms": duration * 1000,
+                },
+            )
+
+        if (
+            settings.DB_SLOW_QUERY_THRESHOLD is not None
+            and duration >= settings.DB_SLOW_QUERY_THRESHOLD
+        ):
+            # Только отпечаток: литералы, подставленные в текст запроса
+            # (literal_execute), не должны попадать в логи
+            logger.warning(
+                f"Slow query {duration * 1000:.1f}ms: {fingerprint} "
+                f"params={redact_parameters(parameters, executemany)}"
+            )
+
+    @staticmethod
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        DB_CONNECTIONS_CHECKED_OUT.inc()
+
+    @staticmethod
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            DB_CONNECTION_HOLD_TIME.observe(time.perf_counter() - checked_out_at)
+            DB_CONNECTIONS_CHECKED_OUT.dec()
+
+    @staticmethod
+    def _handle_error(context):
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+        if context.statement:
+            DB_STATEMENT_ERRORS.labels(
+                operation=statement_operation(context.statement),
+                fingerprint=statement_fingerprint(context.statement),
+            ).inc()
+
     def create_session(self) -> AsyncSession:
         """
         Возвращает новый AsyncSession (без открытия транзакции).
@@ -43,6 +172,13 @@ class AsyncDbEngine:
         """
         return self._session_factory()
 
+    async def dispose(self) -> None:
+        """
+        Закрывает все соединения пула. Вызывается при остановке приложения.
+        """
+        await self.engine.dispose()
+        logger.info("Пул соединений с БД закрыт")
+
     async def request(
         self,
         db_request: Union[str, Any],
@@ -1,19 +1,67 @@
+import hashlib
 
 from sqlalchemy import (
     Column,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Float,
 )
 from sqlalchemy.orm import declarative_base
 
+from .settings import settings
+
 
 Base = declarative_base()
 
+EMAIL_KEY_SIZE = 16
+
+
+def email_lookup_key(email: str) -> bytes:
+    """
+    Ключ поиска оценки: 16-байтовый BLAKE2b от email в том виде, в котором
+    его вернул Auth API, — ключ однозначно соответствует колонке email.
+    Фиксированная ширина делает индекс заметно компактнее, чем по строке.
+    """
+    return hashlib.blake2b(email.encode(), digest_size=EMAIL_KEY_SIZE).digest()
+
 
 class RatingRecords(Base):
     __tablename__ = "rating_records"
+    __table_args__ = (
+        # Одна оценка на пользователя: ключ для INSERT ... ON CONFLICT.
+        # value включён в индекс, чтобы /ratings/my читался index-only scan
+        Index(
+            "uq_rating_records_email_key",
+            "email_key",
+            unique=True,
+            postgresql_include=["value"],
+        ),
+        # text_pattern_ops обслуживает и равенство, и поиск по префиксу
+        # (LIKE 'abc%'); id — постраничное чтение по префиксу в порядке (email, id)
+        Index(
+            "ix_rating_records_email_id",
+            "email",
+            "id",
+            postgresql_ops={"email": "text_pattern_ops"},
+        ),
+        # фильтр по диапазону оценок в админском списке: страницы
+        # упорядочены по (value, id) и читаются из индекса без сортировки
+        Index("ix_rating_records_value_id", "value", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False)
+    email_key = Column(LargeBinary(EMAIL_KEY_SIZE), nullable=True)
     value = Column(Float, nullable=False)
+
+    @classmethod
+    def owned_by(cls, email: str):
+        """
+        Условие поиска записей пользователя: по email_key, если включён
+        DB_EMAIL_KEY_LOOKUP (после заполнения ключей), иначе по email.
+        """
+        if settings.DB_EMAIL_KEY_LOOKUP:
+            return cls.email_key == email_lookup_key(email)
+        return cls.email == email
@@ -15,6 +15,17 @@ class DbSettings(BaseSettings):
     DB_PASSWORD: str | None = "postgres"
     DB_NAME: str | None = "ratings"
 
+    # Полный URL подключения; если задан, параметры выше игнорируются
+    # (например, sqlite+aiosqlite:// для бенчмарков)
+    DB_URL: str | None = None
+
+    # Искать оценки по хэшу email (rating_records.email_key) вместо строки.
+    # Включать после миграции и `python -m app.services.db.backfill_email_keys`
+    DB_EMAIL_KEY_LOOKUP: bool = False
+
+    # Запросы дольше порога (в секундах) логируются с обезличенными параметрами
+    DB_SLOW_QUERY_THRESHOLD: float | None = 0.2
+
     class Config:
         env_file = ".env"
         # env_file = ".env.development"
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from aiohttp import ClientTimeout
+from sqlalchemy.sql import text
+
+from app.services.auth import auth_breaker, get_auth_client
+from app.services.db.engine import db_engine
+from app.services.redisClient import redis_client_async
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def check_db():
+    await db_engine.request(text("SELECT 1"))
+
+
+async def check_redis():
+    await redis_client_async.ping()
+
+
+async def check_auth_api():
+    url = f"{settings.AUTH_API_URL}{settings.AUTH_API_HEALTH_PATH}"
+    timeout = ClientTimeout(total=settings.HEALTH_CHECK_TIMEOUT)
+    async with get_auth_client().get(url, timeout=timeout) as response:
+        if response.status >= 500:
+            raise RuntimeError(f"Auth API ответил {response.status}")
+
+
+async def check_auth_breaker():
+    if auth_breaker.state != auth_breaker.CLOSED:
+        raise RuntimeError(f"размыкатель Auth API: {auth_breaker.state}")
+
+
+class ReadinessProbe:
+    """
+    Параллельно проверяет зависимости сервиса с коротким таймаутом и кэширует
+    результат на HEALTH_CHECK_CACHE_TTL секунд: частые запросы проб от K8s
+    не создают дополнительной нагрузки на БД, Redis и Auth API.
+
+    Проверки из advisory попадают в ответ, но не влияют на готовность:
+    без них под продолжает обслуживать запросы в деградированном режиме.
+    """
+
+    def __init__(
+        self,
+        checks: dict[str, Callable[[], Awaitable[None]]],
+        advisory: set[str] | None = None,
+    ):
+        self.checks = checks
+        self.advisory = advisory or set()
+        self._lock = asyncio.Lock()
+        self._result: tuple[bool, dict[str, str]] | None = None
+        self._checked_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._checked_at < settings.HEALTH_CHECK_CACHE_TTL
+        )
+
+    async def _run(self, name: str, check: Callable[[], Awaitable[None]]) -> str:
+        try:
+            await asyncio.wait_for(check(), timeout=settings.HEALTH_CHECK_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Проверка готовности {name}: таймаут")
+            return "timeout"
+        except Exception as e:
+            logger.warning(f"Проверка готовности {name}: {e!r}")
+            return f"error: {type(e).__name__}"
+        return "ok"
+
+    async def check(self) -> tuple[bool, dict[str, str]]:
+        if self._is_fresh():
+            return self._result
+
+        # Одновременные пробы ждут одну общую проверку
+        async with self._lock:
+            if self._is_fresh():
+                return self._result
+
+            statuses = await asyncio.gather(
+                *(self._run(name, check) for name, check in self.checks.items())
+            )
+            results = dict(zip(self.checks, statuses))
+            ready = all(
+                status == "ok"
+                for name, status in results.items()
+                if name not in self.advisory
+            )
+            self._result = (ready, results)
+            self._checked_at = time.monotonic()
+            return self._result
+
+
+readiness_probe = ReadinessProbe(
+    {
+        "db": check_db,
+        "redis": check_redis,
+        "auth_api": check_auth_api,
+        "auth_api_breaker": check_auth_breaker,
+    },
+    # Пока Auth API недоступен, под отвечает из кэша пользователей или
+    # быстрым 503; снимать его из балансировки из-за этого нельзя
+    advisory={"auth_api", "auth_api_breaker"},
+)
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from prometheus_client import Histogram
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG = Histogram(
+    "fastapi_event_loop_lag_seconds",
+    "Histogram of event loop lag: how late a scheduled wake-up actually ran (in seconds)",
+    ["app_name"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class LoopLagMonitor:
+    """
+    Измеряет задержку event loop: насколько позже запланированного
+    просыпается корутина, спящая interval секунд. В режиме debug отдельный
+    поток-сторож логирует стек потока цикла, если тот заблокирован дольше
+    block_threshold секунд, — это и есть синхронный код, который надо убрать.
+
+    Сторож следит за собственным пульсом с шагом block_threshold / 4, а не
+    за циклом замера задержки: иначе блокировки короче interval не видны.
+    """
+
+    def __init__(
+        self,
+        app_name: str,
+        interval: float,
+        debug: bool = False,
+        block_threshold: float = 0.1,
+    ):
+        self.app_name = app_name
+        self.interval = interval
+        self.debug = debug
+        self.block_threshold = block_threshold
+        self.beat_interval = block_threshold / 4
+        self._last_beat = time.perf_counter()
+        self._watchdog: threading.Thread | None = None
+        self._watchdog_stop = threading.Event()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        heartbeat = None
+        if self.debug:
+            # Супервизор перезапускает run() после падения: прежний сторож
+            # должен завершиться до запуска нового
+            self._stop_watchdog()
+            self._last_beat = time.perf_counter()
+            heartbeat = asyncio.create_task(self._heartbeat())
+            self._watchdog_stop = threading.Event()
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(threading.get_ident(), self._watchdog_stop),
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+        histogram = EVENT_LOOP_LAG.labels(app_name=self.app_name)
+        try:
+            while not stop.is_set():
+                expected = time.perf_counter() + self.interval
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    histogram.observe(max(time.perf_counter() - expected, 0.0))
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self._stop_watchdog()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._last_beat = time.perf_counter()
+            await asyncio.sleep(self.beat_interval)
+
+    def _stop_watchdog(self) -> None:
+        self._watchdog_stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _watch(self, loop_thread_id: int, stop: threading.Event) -> None:
+        reported_beat = None
+        while not stop.wait(self.beat_interval):
+            beat = self._last_beat
+            blocked_for = time.perf_counter() - beat - self.beat_interval
+            if blocked_for < self.block_threshold or beat == reported_beat:
+                continue
+
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is None:
+                return
+            reported_beat = beat
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                f"Event loop заблокирован {blocked_for * 1000:.0f} мс:\n{stack}"
+            )
+
+
+loop_lag_monitor = LoopLagMonitor(
+    settings.APP_TITLE,
+    settings.LOOP_MONITOR_INTERVAL,
+    debug=settings.LOOP_MONITOR_DEBUG,
+    block_threshold=settings.LOOP_MONITOR_BLOCK_THRESHOLD,
+)
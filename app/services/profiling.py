@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Callable
+
+
+def thread_cpu_time(thread_id: int) -> float | None:
+    """
+    Процессорное время потока в секундах или None, если платформа не даёт
+    его узнать (нет pthread_getcpuclockid) или поток уже завершился.
+    """
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def fold_stack(frame: FrameType | None, thread_name: str) -> str:
+    """
+    Стек в формате collapsed stacks (flamegraph.pl, speedscope):
+    кадры от корня к листу через ';'.
+    """
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ";".join(reversed(frames))
+
+
+def render_folded(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class StackSampler(threading.Thread):
+    """
+    Поток, который раз в interval секунд снимает стеки потоков процесса.
+    thread_id ограничивает выборку одним потоком, а should_sample позволяет
+    снимать стеки только в нужные моменты (например, во время зависания цикла).
+    С skip_idle не учитываются стеки потоков, чьё процессорное время не
+    выросло с прошлого снимка: такой поток всё это время ждал (блокировка,
+    очередь, select/epoll цикла событий, sleep, сокет), где бы он ни ждал.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        thread_id: int | None = None,
+        should_sample: Callable[[], bool] | None = None,
+        skip_idle: bool = False,
+    ):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.thread_id = thread_id
+        self.should_sample = should_sample
+        self.skip_idle = skip_idle
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._cpu_times: dict[int, float | None] = {}
+
+    def run(self):
+        if self.skip_idle:
+            self._cpu_times = self._thread_cpu_times()
+        while not self._stopped.wait(self.interval):
+            if self.should_sample is not None and not self.should_sample():
+                continue
+
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            if self.skip_idle:
+                previous, self._cpu_times = self._cpu_times, self._thread_cpu_times()
+            for thread_id, frame in frames.items():
+                if thread_id == self.ident:
+                    continue
+                if self.thread_id is not None and thread_id != self.thread_id:
+                    continue
+                if self.skip_idle and self._was_idle(thread_id, previous):
+                    continue
+                self.samples[fold_stack(frame, names.get(thread_id, str(thread_id)))] += 1
+
+    def _thread_cpu_times(self) -> dict[int, float | None]:
+        return {
+            thread.ident: thread_cpu_time(thread.ident)
+            for thread in threading.enumerate()
+            if thread.ident is not None
+        }
+
+    def _was_idle(self, thread_id: int, previous: dict[int, float | None]) -> bool:
+        before = previous.get(thread_id)
+        now = self._cpu_times.get(thread_id)
+        if before is None or now is None:
+            # Поток появился только что или время недоступно: не отбрасываем
+            return False
+        return now <= before
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.samples
+
+
+async def capture_cpu_profile(seconds: float, interval: float) -> str:
+    """
+    Сэмплирующий профиль всех потоков процесса за seconds секунд. Снимки
+    потоков, не потративших процессорного времени с прошлого снимка, в
+    профиль не попадают, поэтому в нём остаётся только время, когда код
+    выполнялся.
+    """
+    sampler = StackSampler(interval, skip_idle=True)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        samples = sampler.stop()
+    return render_folded(samples)
+
+
+async def capture_loop_stalls(seconds: float, threshold: float, interval: float) -> str:
+    """
+    Стеки потока event loop, снятые только пока цикл не отвечает дольше
+    threshold секунд: показывают, какой код блокирует цикл.
+    """
+    last_beat = time.perf_counter()
+
+    async def heartbeat():
+        nonlocal last_beat
+        while True:
+            last_beat = time.perf_counter()
+            await asyncio.sleep(interval)
+
+    sampler = StackSampler(
+        interval,
+        thread_id=threading.get_ident(),
+        should_sample=lambda: time.perf_counter() - last_beat > threshold,
+    )
+    beat = asyncio.create_task(heartbeat())
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        beat.cancel()
+        samples = sampler.stop()
+    return render_folded(samples)
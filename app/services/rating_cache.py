@@ -0,0 +1,83 @@
+import hashlib
+import logging
+
+from app.services.redisClient import redis_client_async
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def rating_cache_key(email: str) -> str:
+    return f"{settings.REDIS_RATING_CACHE_NAMESPACE}{email}"
+
+
+def make_rating_etag(value: float) -> str:
+    """
+    Слабый ETag, вычисляемый только из значения оценки: одинаковое значение
+    даёт одинаковый тег независимо от сериализации ответа.
+    """
+    digest = hashlib.blake2b(repr(float(value)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Слабое сравнение ETag по заголовку If-None-Match (RFC 9110, 13.1.2).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def get_cached_rating(email: str) -> float | None:
+    """
+    Возвращает оценку из Redis или None, если её нет в кэше или Redis недоступен.
+    """
+    try:
+        cached = await redis_client_async.get(rating_cache_key(email))
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать оценку из Redis: {e}")
+        return None
+
+    if cached is None:
+        return None
+    try:
+        return float(cached)
+    except ValueError:
+        return None
+
+
+async def set_cached_rating(email: str, value: float) -> None:
+    """
+    Заполняет кэш значением, прочитанным из БД (read-through). Запись
+    только при отсутствии ключа (NX): значение, прочитанное до конкурентного
+    обновления, не перезапишет инвалидацию. Ошибки Redis не должны ломать
+    запрос, поэтому они только логируются.
+    """
+    try:
+        await redis_client_async.set(
+            rating_cache_key(email),
+            repr(float(value)),
+            ex=settings.REDIS_RATING_CACHE_TTL,
+            nx=True,
+        )
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить оценку в Redis: {e}")
+
+
+async def invalidate_cached_rating_quietly(email: str) -> None:
+    """
+    Удаляет оценку из кэша после фиксации изменения в БД. Ошибки Redis
+    только логируются: сохранённая оценка важнее кэша, а устаревшее
+    значение продержится не дольше REDIS_RATING_CACHE_TTL.
+    """
+    try:
+        await redis_client_async.delete(rating_cache_key(email))
+    except Exception as e:
+        logger.warning(f"Не удалось удалить оценку из Redis: {e}")
@@ -1,9 +1,85 @@
-import aioredis
+import asyncio
+import functools
+import inspect
 import logging
+import time
+
+import aioredis
+from aioredis.exceptions import ConnectionError as RedisConnectionError
+from aioredis.exceptions import RedisError
+from prometheus_client import Counter, Histogram
+
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Histogram of Redis command execution time by command and outcome (in seconds)",
+    ["command", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+REDIS_COMMAND_ERRORS = Counter(
+    "redis_command_errors_total",
+    "Total count of failed Redis commands by command and error type",
+    ["command", "error"],
+)
+REDIS_COMMAND_RETRIES = Counter(
+    "redis_command_retries_total",
+    "Total count of Redis commands retried after a connection error",
+    ["command"],
+)
+
+# Команды, повтор которых после обрыва соединения не меняет результат:
+# если первая попытка дошла до Redis, вторая оставит то же состояние.
+# INCR, LPUSH и т.п. сюда не входят — при повторе они применятся дважды.
+IDEMPOTENT_COMMANDS = frozenset(
+    {
+        "ping",
+        "get",
+        "mget",
+        "exists",
+        "ttl",
+        "pttl",
+        "hget",
+        "hmget",
+        "hgetall",
+        "smembers",
+        "sismember",
+        "lrange",
+        "set",
+        "mset",
+        "setex",
+        "delete",
+        "unlink",
+        "expire",
+        "persist",
+        "hset",
+        "hdel",
+        "sadd",
+        "srem",
+    }
+)
+
+
+class PoolExhaustedError(RedisConnectionError):
+    """
+    Свободное соединение не появилось за REDIS_POOL_TIMEOUT: пул исчерпан,
+    а не разорвано соединение, поэтому команда не повторяется.
+    """
+
+
+class BoundedConnectionPool(aioredis.BlockingConnectionPool):
+    async def get_connection(self, command_name, *keys, **options):
+        try:
+            return await super().get_connection(command_name, *keys, **options)
+        except RedisConnectionError as e:
+            # BlockingConnectionPool сообщает об исчерпании тем же
+            # ConnectionError, что и об обрыве, но из таймаута ожидания очереди
+            if isinstance(e.__context__, (asyncio.TimeoutError, asyncio.QueueEmpty)):
+                raise PoolExhaustedError(str(e)) from e
+            raise
+
 
 class RedisClientAsync:
     _instance = None
@@ -17,14 +93,28 @@ class RedisClientAsync:
     async def connect(self):
         """
         Подключение к Redis. Если клиент ещё не проинициализирован, создаём его.
+
+        Пул ограничен REDIS_MAX_CONNECTIONS: при исчерпании команда ждёт
+        свободное соединение до REDIS_POOL_TIMEOUT секунд, а не открывает
+        новое. Простаивающие дольше REDIS_HEALTH_CHECK_INTERVAL соединения
+        проверяются PING перед использованием и при необходимости
+        переподключаются.
         """
         if self._redis is None:
+            url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}"
             try:
-                self._redis = await aioredis.from_url(
-                    f"redis://{settings.REDIS_HOST}",
+                pool = BoundedConnectionPool.from_url(
+                    url,
                     decode_responses=True,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    timeout=settings.REDIS_POOL_TIMEOUT,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                    socket_keepalive=True,
+                    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
                 )
-                logger.info(f"Подключение к Redis: redis://{settings.REDIS_HOST}")
+                self._redis = aioredis.Redis(connection_pool=pool)
+                logger.info(f"Подключение к Redis: {url}")
             except Exception as e:
                 logger.error(f"Ошибка подключения к Redis: {e}")
                 raise
@@ -35,19 +125,109 @@ class RedisClientAsync:
         """
         if self._redis:
             await self._redis.close()
+            await self._redis.connection_pool.disconnect()
             logger.info("Отключение от Redis.")
             self._redis = None
 
-    def __getattr__(self, name):
+    async def _call(self, command: str, run, pending=None, retryable: bool = False):
         """
-        Перенаправление всех запросов (кроме явно определённых методов)
-        к объекту redis. Если redis не подключён, генерируется исключение.
+        Выполняет команду с замером времени. Оборванное соединение aioredis
+        закрывает сам и переоткрывает при следующем использовании, поэтому
+        идемпотентная (retryable) команда при ConnectionError повторяется до
+        REDIS_RETRY_ATTEMPTS раз с экспоненциальной паузой. Исчерпание пула
+        не повторяется: повтор только добавил бы нагрузки.
+
+        run() создаёт awaitable команды; pending — уже созданный awaitable
+        для первой попытки.
+        """
+        attempt = 0
+        while True:
+            awaitable = pending if pending is not None else run()
+            pending = None
+            started = time.perf_counter()
+            try:
+                result = await awaitable
+            except RedisError as e:
+                REDIS_COMMAND_DURATION.labels(command=command, outcome="error").observe(
+                    time.perf_counter() - started
+                )
+                REDIS_COMMAND_ERRORS.labels(command=command, error=type(e).__name__).inc()
+                if (
+                    not retryable
+                    or not isinstance(e, RedisConnectionError)
+                    or isinstance(e, PoolExhaustedError)
+                    or attempt >= settings.REDIS_RETRY_ATTEMPTS
+                ):
+                    raise
+
+                delay = settings.REDIS_RETRY_BACKOFF * 2**attempt
+                attempt += 1
+                REDIS_COMMAND_RETRIES.labels(command=command).inc()
+                logger.warning(
+                    f"Redis: ошибка соединения при {command} ({e}), "
+                    f"повтор {attempt} через {delay:.2f} с"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            REDIS_COMMAND_DURATION.labels(command=command, outcome="ok").observe(
+                time.perf_counter() - started
+            )
+            return result
+
+    async def execute_batch(self, *commands: tuple, transaction: bool = False) -> list:
         """
+        Выполняет несколько команд за один round-trip и возвращает их
+        результаты по порядку:
+            await redis_client_async.execute_batch(("get", key), ("set", key2, value))
+        С transaction=True команды оборачиваются в MULTI/EXEC. Пачка
+        повторяется после обрыва соединения, только если все её команды
+        идемпотентны.
+        """
+        client = self._get_client()
+
+        def run_pipeline():
+            # Pipeline очищается после execute(), поэтому на повтор
+            # собирается заново
+            pipe = client.pipeline(transaction=transaction)
+            for name, *args in commands:
+                getattr(pipe, name)(*args)
+            return pipe.execute()
+
+        retryable = all(name in IDEMPOTENT_COMMANDS for name, *_ in commands)
+        return await self._call("pipeline", run_pipeline, retryable=retryable)
+
+    def _get_client(self) -> aioredis.Redis:
         if self._redis is None:
             raise Exception(
                 "Redis не подключен. Вызовите connect() перед использованием."
             )
-        return getattr(self._redis, name)
+        return self._redis
+
+    def __getattr__(self, name):
+        """
+        Перенаправление всех запросов (кроме явно определённых методов)
+        к объекту redis. Команды (методы, возвращающие корутину) выполняются
+        через _call с метриками; повторяются только команды из
+        IDEMPOTENT_COMMANDS. Если redis не подключён, генерируется исключение.
+        """
+        attr = getattr(self._get_client(), name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        @functools.wraps(attr)
+        def command(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not inspect.iscoroutine(result):
+                return result
+            return self._call(
+                name,
+                functools.partial(attr, *args, **kwargs),
+                result,
+                retryable=name in IDEMPOTENT_COMMANDS,
+            )
+
+        return command
 
     def __repr__(self):
         return f"<RedisClient connected={self._redis is not None}>"
@@ -0,0 +1,23 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+
+    def json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=str).decode()
+
+else:
+    FastJSONResponse = JSONResponse
+
+    def json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
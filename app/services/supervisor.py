@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Фоновый цикл получает событие остановки и должен завершиться сам,
+# доделав текущую итерацию, как только оно выставлено.
+LoopFactory = Callable[[asyncio.Event], Awaitable[None]]
+
+
+class BackgroundSupervisor:
+    """
+    Владеет всеми фоновыми циклами процесса: запускает их, перезапускает
+    упавшие с экспоненциальной задержкой и останавливает при завершении
+    приложения.
+
+    Текущие HTTP-запросы к этому моменту уже завершены: uvicorn запускает
+    shutdown lifespan только после того, как перестал принимать соединения
+    и дождался открытых (не дольше SERVER_GRACEFUL_SHUTDOWN_TIMEOUT).
+    """
+
+    def __init__(self):
+        self._loops: dict[str, LoopFactory] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._stop: asyncio.Event | None = None
+
+    def add(self, name: str, factory: LoopFactory) -> None:
+        self._loops[name] = factory
+
+    def start(self) -> None:
+        self._stop = asyncio.Event()
+        for name, factory in self._loops.items():
+            self._tasks[name] = asyncio.create_task(
+                self._supervise(name, factory), name=name
+            )
+
+    async def _supervise(self, name: str, factory: LoopFactory) -> None:
+        backoff = settings.BACKGROUND_TASK_BACKOFF_INITIAL
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                await factory(self._stop)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Фоновая задача {name} упала: {e!r}", exc_info=True)
+            else:
+                if self._stop.is_set():
+                    return
+                logger.warning(f"Фоновая задача {name} завершилась без остановки")
+
+            # Задача, проработавшая дольше максимальной задержки, считается
+            # здоровой: следующий перезапуск снова начинается с минимальной.
+            if time.monotonic() - started > settings.BACKGROUND_TASK_BACKOFF_MAX:
+                backoff = settings.BACKGROUND_TASK_BACKOFF_INITIAL
+
+            logger.info(f"Перезапуск фоновой задачи {name} через {backoff:.1f} с")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, settings.BACKGROUND_TASK_BACKOFF_MAX)
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Просит фоновые циклы завершиться и ждёт их не дольше timeout,
+        после чего отменяет оставшиеся.
+        """
+        if self._stop is None:
+            return
+        self._stop.set()
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(tasks, timeout=max(timeout, 0))
+        for task in pending:
+            logger.warning(f"Фоновая задача {task.get_name()} отменена по таймауту")
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+supervisor = BackgroundSupervisor()
@@ -1,4 +1,7 @@
 
+import logging
+import os
+import threading
 import time
 from typing import Tuple
 
@@ -8,9 +11,10 @@ from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import \
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import multiprocess
 from prometheus_client.openmetrics.exposition import (CONTENT_TYPE_LATEST,
                                                       generate_latest)
 from starlette.middleware.base import (BaseHTTPMiddleware,
@@ -23,7 +27,8 @@ from starlette.types import ASGIApp
 
 INFO = Gauge(
     "fastapi_app_info", "FastAPI application information.", [
-        "app_name"]
+        "app_name"],
+    multiprocess_mode="max",
 )
 REQUESTS = Counter(
     "fastapi_requests_total", "Total count of requests by method and path.", [
@@ -48,6 +53,7 @@ REQUESTS_IN_PROGRESS = Gauge(
     "fastapi_requests_in_progress",
     "Gauge of requests by method and path currently being processed",
     ["method", "path", "app_name"],
+    multiprocess_mode="livesum",
 )
 
 
@@ -105,10 +111,78 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
 
 
 def metrics(request: Request) -> Response:
-    return Response(generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
-
-
-def setting_otlp(app: ASGIApp, app_name: str, endpoint: str, log_correlation: bool = True) -> None:
+    # С несколькими воркерами (launcher задаёт PROMETHEUS_MULTIPROC_DIR)
+    # метрики собираются из файлов всех процессов, а не только текущего
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+def mark_metrics_process_dead() -> None:
+    """
+    Убирает live-гейджи завершающегося воркера из общих файлов метрик.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class SlowRequestSpanProcessor(SpanProcessor):
+    """
+    Копит завершённые дочерние спаны до окончания корневого спана запроса
+    и, если запрос шёл дольше threshold секунд, логирует разбивку по спанам.
+    Число одновременно отслеживаемых трейсов ограничено max_traces.
+    """
+
+    def __init__(self, logger: logging.Logger, threshold: float, max_traces: int = 1000) -> None:
+        self.logger = logger
+        self.threshold = threshold
+        self.max_traces = max_traces
+        self._spans: dict[int, list[ReadableSpan]] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+
+        with self._lock:
+            if not is_root:
+                if trace_id in self._spans or len(self._spans) < self.max_traces:
+                    self._spans.setdefault(trace_id, []).append(span)
+                return
+            children = self._spans.pop(trace_id, [])
+
+        duration = (span.end_time - span.start_time) / 1e9
+        if duration < self.threshold:
+            return
+
+        breakdown = "; ".join(
+            f"{child.name} +{(child.start_time - span.start_time) / 1e6:.1f}ms "
+            f"{(child.end_time - child.start_time) / 1e6:.1f}ms"
+            for child in sorted(children, key=lambda c: c.start_time)
+        )
+        self.logger.warning(
+            f"Slow request {span.name}: {duration * 1000:.1f}ms [{breakdown}]",
+            extra={"status_code": span.attributes.get("http.status_code")},
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def setting_otlp(
+    app: ASGIApp,
+    app_name: str,
+    endpoint: str,
+    log_correlation: bool = True,
+    slow_request_threshold: float | None = None,
+) -> None:
     # Setting OpenTelemetry
     # set the service name to show in traces
     resource = Resource.create(attributes={
@@ -122,6 +196,11 @@ def setting_otlp(app: ASGIApp, app_name: str, endpoint: str, log_correlation: bo
     tracer.add_span_processor(BatchSpanProcessor(
         OTLPSpanExporter(endpoint=endpoint, insecure=True)))
 
+    if slow_request_threshold is not None:
+        # логгер с именем приложения — это app_logger с выводом в консоль и Loki
+        tracer.add_span_processor(SlowRequestSpanProcessor(
+            logging.getLogger(app_name), slow_request_threshold))
+
     if log_correlation:
         LoggingInstrumentor().instrument(set_logging_format=True)
 
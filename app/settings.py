@@ -7,14 +7,15 @@ from fastapi.security import HTTPBearer
 from fastapi import WebSocket
 from typing import Set
 import socket
-import json
 import datetime
 
-from multiprocessing import Queue
+from queue import SimpleQueue
 from logging.handlers import QueueHandler, QueueListener
 
 from logging_loki import LokiHandler
 
+from app.services.serialization import json_dumps
+
 
 s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 s.connect(("8.8.8.8", 80))
@@ -41,6 +42,14 @@ class Settings(BaseSettings):
     ROOT_PATH: str | None = "/ratings-api"
     PORT: int | None = 8080
 
+    # Параметры запуска в PRODUCTION (см. launcher.py)
+    SERVER_MANAGER: str = "uvicorn"  # uvicorn | gunicorn
+    WORKERS: int | None = None  # None — по квоте CPU контейнера
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_TIMEOUT: int = 5
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    SERVER_GRACEFUL_SHUTDOWN_TIMEOUT: int = 20
+
     SECRET_KEY: str = secrets.token_urlsafe(32)
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
@@ -58,9 +67,34 @@ class Settings(BaseSettings):
     DOMAIN_NAME: str | None = "http://hse-coursework-health.ru"
     AUTH_API_URL: str | None = f"{DOMAIN_NAME}:8081"
     AUTH_API_USER_INFO_PATH: str | None = "/auth-api/api/v1/auth/users/me"
+    AUTH_API_HEALTH_PATH: str | None = "/auth-api/status"
+    AUTH_API_TIMEOUT: float = 2.0
+    AUTH_API_CONNECT_TIMEOUT: float = 0.5
+    AUTH_API_POOL_SIZE: int = 100
+    # Размыкатель цепи: открывается, когда доля ошибок среди последних
+    # AUTH_API_BREAKER_WINDOW запросов достигает AUTH_API_BREAKER_FAILURE_RATE
+    AUTH_API_BREAKER_FAILURE_RATE: float = 0.5
+    AUTH_API_BREAKER_WINDOW: int = 20
+    AUTH_API_BREAKER_MIN_CALLS: int = 10
+    AUTH_API_BREAKER_OPEN_SECONDS: float = 10.0
+    # Пользователи, которых можно обслуживать из кэша, пока Auth API недоступен
+    AUTH_IDENTITY_CACHE_SIZE: int = 10000
+    AUTH_IDENTITY_CACHE_TTL: float = 300.0
+
+    HEALTH_CHECK_TIMEOUT: float = 1.0
+    HEALTH_CHECK_CACHE_TTL: float = 3.0
 
     REDIS_HOST: str | None = "localhost"
     REDIS_PORT: str | None = "6379"
+    # Пул соединений: при исчерпании команда ждёт REDIS_POOL_TIMEOUT секунд;
+    # при обрыве соединения команда повторяется REDIS_RETRY_ATTEMPTS раз
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 1.0
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 0.5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_RETRY_ATTEMPTS: int = 1
+    REDIS_RETRY_BACKOFF: float = 0.05
     REDIS_DATA_COLLECTION_GOOGLE_FITNESS_API_PROGRESS_BAR_NAMESPACE: str | None = (
         "REDIS_DATA_COLLECTION_GOOGLE_FITNESS_API_PROGRESS_BAR_NAMESPACE-"
     )
@@ -71,12 +105,55 @@ class Settings(BaseSettings):
     REDIS_FIND_OUTLIERS_JOB_IS_ACTIVE_NAMESPACE: str | None = (
         "REDIS_FIND_OUTLIERS_JOB_IS_ACTIVE_NAMESPACE-"
     )
+    REDIS_RATING_CACHE_NAMESPACE: str | None = "REDIS_RATING_CACHE_NAMESPACE-"
+    # Короткий TTL ограничивает время жизни устаревшего значения, если
+    # инвалидация после коммита не удалась
+    REDIS_RATING_CACHE_TTL: int | None = 60 * 5
 
     BATCH_SIZE: int | None = 100
 
+    RATINGS_PAGE_SIZE_DEFAULT: int = 50
+    RATINGS_PAGE_SIZE_MAX: int = 200
+
+    BACKGROUND_TASK_BACKOFF_INITIAL: float = 1.0
+    BACKGROUND_TASK_BACKOFF_MAX: float = 30.0
+    BACKGROUND_TASK_STOP_TIMEOUT: float = 5.0
+
+    # Сжатие ответов: только типы из списка ("text/" — префикс) и тела
+    # не меньше COMPRESSION_MIN_SIZE байт; brotli/zstd — если установлены
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CONTENT_TYPES: list[str] = [
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "image/svg+xml",
+        "text/",
+    ]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
     OTLP_GRPC_ENDPOINT: str | None = "tempo:4317"
     LOKI_URL: str | None = "http://loki:3100/loki/api/v1/push"
 
+    ADMIN_EMAILS: list[str] = []  # JSON-список, например ["admin@example.com"]
+
+    # Профилирование по запросу администратора (/api/v1/admin/profile)
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: int = 60
+    PROFILING_SAMPLE_INTERVAL: float = 0.005
+    PROFILING_LOOP_STALL_THRESHOLD: float = 0.1
+
+    # Запросы дольше порога (в секундах) логируются с разбивкой по спанам
+    SLOW_REQUEST_THRESHOLD: float | None = 1.0
+
+    # Мониторинг задержки event loop; в режиме debug логируются стеки
+    # кода, блокирующего цикл дольше LOOP_MONITOR_BLOCK_THRESHOLD секунд
+    LOOP_MONITOR_INTERVAL: float = 0.5
+    LOOP_MONITOR_DEBUG: bool = False
+    LOOP_MONITOR_BLOCK_THRESHOLD: float = 0.1
+
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: str | list[str]) -> str | list[str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -128,10 +205,12 @@ class JsonConsoleFormatter(logging.Formatter):
             "service"    : getattr(record, "otelServiceName", None),
             "msg"        : record.getMessage(),
         }
-        return json.dumps(log, ensure_ascii=False)
+        return json_dumps(log)
 
 
-queue = Queue(-1)
+# Очередь внутри процесса: в отличие от multiprocessing.Queue запись
+# не требует pickle и записи в pipe из потока event loop
+queue = SimpleQueue()
 queue_handler = QueueHandler(queue)
 json_formatter = JsonConsoleFormatter()
 
@@ -147,15 +226,16 @@ http_loki_handler = LokiHandler(
     version="1",
 )
 http_loki_handler.setFormatter(json_formatter)
+# Запускается и останавливается в lifespan приложения (app/main.py) вместе
+# с подключением queue_handler: без запущенного слушателя записи копились бы
+# в неограниченной очереди
 listener = QueueListener(queue, http_loki_handler)
-listener.start()
 
 
 
 app_logger = logging.getLogger(settings.APP_TITLE)
 app_logger.setLevel(logging.INFO)
 app_logger.addHandler(console_handler)
-app_logger.addHandler(queue_handler)
 
 
 class EndpointFilter(logging.Filter):
@@ -0,0 +1,207 @@
+"""
+Микробенчмарк накладных расходов middleware и зависимостей на запрос.
+
+Каждый слой из продового стека по отдельности навешивается на пустое
+приложение с тем же эндпоинтом, что и GET /api/v1/ratings/my, и прогоняется
+через in-process ASGI-клиент. Стоимость слоя — разница со «голым»
+приложением; строка full — весь стек сразу, как в app.main.
+
+    python -m benchmarks.bench_middleware --requests 2000 2>/dev/null
+    python -m benchmarks.bench_middleware --compare benchmarks/results/<файл>.json
+
+get_current_user ходит в заглушку Auth API (benchmarks.fakes), БД — in-memory
+SQLite (get_lazy_session не берёт соединение, пока нет запросов); вывод логов
+идёт в stderr.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.common import (
+    load_results,
+    make_report,
+    save_results,
+    start_process,
+    stop_processes,
+    wait_for_http,
+)
+
+ENDPOINT = "/api/v1/ratings/my"
+HEADERS = {"Authorization": "Bearer bench-1", "Origin": "http://localhost"}
+
+
+def build_layers() -> dict[str, tuple[list[Callable], list[Callable]]]:
+    """
+    Слои стека: имя -> (функции, навешивающие middleware, зависимости).
+    Модули приложения импортируются здесь, когда окружение уже настроено.
+    """
+    from fastapi.middleware.cors import CORSMiddleware
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+
+    from app.main import log_requests
+    from app.services.auth import get_current_user
+    from app.services.db.db_session import get_lazy_session
+    from app.services.utils import PrometheusMiddleware
+    from app.settings import security
+
+    class NullExporter(SpanExporter):
+        def export(self, spans):
+            return SpanExportResult.SUCCESS
+
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(BatchSpanProcessor(NullExporter()))
+
+    prometheus = lambda app: app.add_middleware(PrometheusMiddleware, app_name="bench")
+    otel = lambda app: FastAPIInstrumentor.instrument_app(
+        app, tracer_provider=tracer_provider
+    )
+    logging_ = lambda app: app.middleware("http")(log_requests)
+    cors = lambda app: app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    middlewares = [prometheus, otel, logging_, cors]
+    dependencies = [security, get_current_user, get_lazy_session]
+
+    return {
+        "bare": ([], []),
+        "PrometheusMiddleware": ([prometheus], []),
+        "FastAPIInstrumentor": ([otel], []),
+        "log_requests": ([logging_], []),
+        "CORSMiddleware": ([cors], []),
+        "security": ([], [security]),
+        "get_current_user": ([], [get_current_user]),
+        "get_lazy_session": ([], [get_lazy_session]),
+        "full": (middlewares, dependencies),
+    }
+
+
+def make_app(middlewares: list[Callable], dependencies: list[Callable]):
+    from fastapi import Depends, FastAPI
+
+    app = FastAPI()
+
+    @app.get(ENDPOINT, dependencies=[Depends(d) for d in dependencies])
+    async def get_my_rating():
+        return {"rating": 4.0}
+
+    for add in middlewares:
+        add(app)
+    return app
+
+
+async def measure(app, requests: int, warmup: int, repeat: int) -> float:
+    from httpx import ASGITransport, AsyncClient
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        for _ in range(warmup):
+            await client.get(ENDPOINT, headers=HEADERS)
+
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = await client.get(ENDPOINT, headers=HEADERS)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{response.status_code}: {response.text}")
+            best = min(best, (time.perf_counter() - started) / requests)
+    return best * 1e6
+
+
+async def run(args) -> list[dict]:
+    layers = build_layers()
+    selected = ["bare", *[name for name in layers if name != "bare" and name in args.layers]]
+
+    results = []
+    for name in selected:
+        middlewares, dependencies = layers[name]
+        per_request = await measure(
+            make_app(middlewares, dependencies), args.requests, args.warmup, args.repeat
+        )
+        results.append({"layer": name, "us_per_request": round(per_request, 2)})
+
+    bare = results[0]["us_per_request"]
+    for result in results:
+        result["overhead_us"] = round(result["us_per_request"] - bare, 2)
+    return results
+
+
+def print_results(results: list[dict], baseline: dict | None) -> None:
+    previous = {r["layer"]: r for r in (baseline or {}).get("results", [])}
+    print(f"{'layer':<22}{'us/req':>10}{'overhead':>10}{'vs baseline':>14}")
+    for r in results:
+        old = previous.get(r["layer"])
+        delta = (
+            f"{(r['us_per_request'] - old['us_per_request']) / old['us_per_request'] * 100:+.1f}%"
+            if old
+            else ""
+        )
+        print(f"{r['layer']:<22}{r['us_per_request']:>10}{r['overhead_us']:>10}{delta:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--layers",
+        nargs="+",
+        default=[
+            "PrometheusMiddleware",
+            "FastAPIInstrumentor",
+            "log_requests",
+            "CORSMiddleware",
+            "security",
+            "get_current_user",
+            "get_lazy_session",
+            "full",
+        ],
+    )
+    parser.add_argument("--auth-port", type=int, default=18081)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    args = parser.parse_args()
+
+    auth_url = f"http://127.0.0.1:{args.auth_port}"
+    os.environ.update(
+        {
+            "DB_URL": "sqlite+aiosqlite://",
+            "AUTH_API_URL": auth_url,
+            "LOKI_URL": f"{auth_url}/loki/api/v1/push",
+            "OTLP_GRPC_ENDPOINT": "127.0.0.1:4317",
+        }
+    )
+
+    processes = [start_process("benchmarks.fakes", ["--port", str(args.auth_port)], dict(os.environ))]
+    try:
+        asyncio.run(wait_for_http(f"{auth_url}/", 30))
+        results = asyncio.run(run(args))
+    finally:
+        stop_processes(processes)
+
+    config = {key: value for key, value in vars(args).items() if key != "compare"}
+    report = make_report("middleware", args.label, config, results)
+    print_results(results, load_results(args.compare))
+    print(f"Результаты сохранены в {save_results(report, args.label)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Стоимость сериализации на запрос: стандартный путь FastAPI
+(jsonable_encoder + JSONResponse на stdlib json) против FastJSONResponse,
+а также сериализация лог-записи JsonConsoleFormatter. Колонка speedup
+показывает выигрыш на весь путь ответа, включая jsonable_encoder.
+
+Запуск:
+    python -m benchmarks.bench_serialization --number 20000
+"""
+
+import argparse
+import datetime
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.v1.rating import RatingOut
+from app.services.serialization import FastJSONResponse, json_dumps
+
+
+def payloads() -> dict[str, object]:
+    return {
+        "ratings/my": RatingOut(rating=4.0),
+        "ratings/submit": {"message": "Оценка обновлена", "rating": 4.0},
+        "bulk (1000 rows)": [
+            {"id": i, "email": f"user{i}@example.com", "rating": float(i % 5 + 1)}
+            for i in range(1000)
+        ],
+    }
+
+
+def log_record() -> dict:
+    return {
+        "timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "level": "INFO",
+        "logger": "HSE-COURSEWORK Rating API",
+        "file": "main.py:42",
+        "status_code": 200,
+        "trace_id": "5b8efff798038103d269b633813fc60c",
+        "span_id": "eee19b7ec3c1b174",
+        "service": "HSE-COURSEWORK Rating API",
+        "msg": "GET /api/v1/ratings/my",
+    }
+
+
+def per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"FastJSONResponse = {FastJSONResponse.__name__}")
+    print(
+        f"{'payload':<20}{'encoder, us':>14}{'stdlib, us':>14}"
+        f"{'fast, us':>14}{'speedup':>10}"
+    )
+
+    for name, payload in payloads().items():
+        number = args.number if not name.startswith("bulk") else max(args.number // 100, 1)
+        encoded = jsonable_encoder(payload)
+        encoder = per_call_us(lambda: jsonable_encoder(payload), number)
+        before = per_call_us(lambda: JSONResponse(content=encoded), number)
+        after = per_call_us(lambda: FastJSONResponse(content=encoded), number)
+        speedup = (encoder + before) / (encoder + after)
+        print(
+            f"{name:<20}{encoder:>14.2f}{before:>14.2f}"
+            f"{after:>14.2f}{speedup:>9.2f}x"
+        )
+
+    record = log_record()
+    before = per_call_us(lambda: json.dumps(record, ensure_ascii=False), args.number)
+    after = per_call_us(lambda: json_dumps(record), args.number)
+    print(f"{'log record':<20}{'-':>14}{before:>14.2f}{after:>14.2f}{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Общие помощники бенчмарков: запуск заглушек, ожидание готовности,
+статистика и сохранение результатов для сравнения прогонов.
+"""
+
+import asyncio
+import datetime
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import ClientError, ClientSession
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def wait_for_http(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with ClientSession() as session:
+        while True:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} не ответил за {timeout} с")
+            await asyncio.sleep(0.2)
+
+
+def start_process(module: str, args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", module, *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_processes(processes: list[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(benchmark: str, label: str | None, config: dict, results: list[dict]) -> dict:
+    return {
+        "benchmark": benchmark,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "label": label,
+        "config": config,
+        "results": results,
+    }
+
+
+def save_results(report: dict, label: str | None) -> Path:
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    name = "-".join(filter(None, [stamp, report.get("benchmark"), label]))
+    path = RESULTS_DIR / f"{name}.json"
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    return path
+
+
+def load_results(path: Path | None) -> dict | None:
+    return json.loads(path.read_text()) if path else None
@@ -0,0 +1,78 @@
+"""
+Локальные заглушки внешних сервисов для бенчмарков: Auth API и приёмник Loki.
+
+Токен вида "bench-<n>" считается валидным и соответствует пользователю
+bench<n>@bench.local, любой другой токен получает 401.
+
+Запуск:
+    python -m benchmarks.fakes --port 18081 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+
+from aiohttp import web
+
+from app.settings import settings
+
+TOKEN_PREFIX = "bench-"
+
+
+def token_for(n: int) -> str:
+    return f"{TOKEN_PREFIX}{n}"
+
+
+def email_for(token: str) -> str:
+    return f"bench{token.removeprefix(TOKEN_PREFIX)}@bench.local"
+
+
+def create_app(latency: float = 0.0) -> web.Application:
+    async def user_info(request: web.Request) -> web.Response:
+        if latency:
+            await asyncio.sleep(latency)
+
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not token.startswith(TOKEN_PREFIX):
+            return web.json_response({"detail": "Invalid token"}, status=401)
+
+        return web.json_response(
+            {
+                "google_sub": token,
+                "email": email_for(token),
+                "name": "Bench User",
+                "picture": "",
+            }
+        )
+
+    async def status(request: web.Request) -> web.Response:
+        return web.json_response("ok")
+
+    async def loki_push(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_get(settings.AUTH_API_USER_INFO_PATH, user_info)
+    app.router.add_get(settings.AUTH_API_HEALTH_PATH, status)
+    app.router.add_post("/loki/api/v1/push", loki_push)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(args.latency_ms / 1000),
+        host=args.host,
+        port=args.port,
+        access_log=None,
+        print=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Сквозной нагрузочный тест ratings API на локальных заглушках.
+
+Поднимает заглушку Auth API/Loki (benchmarks.fakes) и приложение
+(benchmarks.serve) с SQLite или переданной Postgres и fakeredis или локальным
+Redis, после чего нагружает сценарии с заданной конкурентностью:
+
+    my        GET  /api/v1/ratings/my
+    submit    POST /api/v1/ratings/submit
+    progress  проход рассылки прогресса по WebSocket-подписчикам (в процессе)
+
+Для каждого сценария считаются RPS и задержки p50/p95/p99. Результаты
+сохраняются в benchmarks/results/ и могут сравниваться с прошлым прогоном:
+
+    python -m benchmarks.load_test --concurrency 32 --duration 15 --label baseline
+    python -m benchmarks.load_test --concurrency 32 --duration 15 \\
+        --compare benchmarks/results/<файл>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+
+from benchmarks.common import (
+    load_results,
+    make_report,
+    percentile,
+    save_results,
+    start_process,
+    stop_processes,
+    wait_for_http,
+)
+from benchmarks.fakes import token_for
+
+SCENARIOS = ("my", "submit", "progress")
+
+
+def summarize(
+    name: str, latencies: list[float], errors: int, elapsed: float, concurrency: int
+) -> dict:
+    values = sorted(latencies)
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+async def http_request(
+    session: ClientSession, base_url: str, scenario: str, users: int
+) -> bool:
+    headers = {"Authorization": f"Bearer {token_for(random.randrange(users))}"}
+    if scenario == "my":
+        async with session.get(f"{base_url}/api/v1/ratings/my", headers=headers) as r:
+            await r.read()
+            return r.status == 200
+
+    async with session.post(
+        f"{base_url}/api/v1/ratings/submit",
+        headers=headers,
+        json={"rating": random.randint(1, 5)},
+    ) as r:
+        await r.read()
+        return r.status == 200
+
+
+async def seed_ratings(session: ClientSession, base_url: str, users: int) -> None:
+    semaphore = asyncio.Semaphore(16)
+
+    async def submit(n: int):
+        async with semaphore:
+            async with session.post(
+                f"{base_url}/api/v1/ratings/submit",
+                headers={"Authorization": f"Bearer {token_for(n)}"},
+                json={"rating": 1 + n % 5},
+            ) as r:
+                await r.read()
+
+    await asyncio.gather(*(submit(n) for n in range(users)))
+
+
+async def run_http_scenario(
+    base_url: str, scenario: str, concurrency: int, duration: float, warmup: float, users: int
+) -> dict:
+    connector = TCPConnector(limit=concurrency)
+    async with ClientSession(
+        connector=connector, timeout=ClientTimeout(total=30)
+    ) as session:
+        if scenario == "my":
+            await seed_ratings(session, base_url, users)
+
+        latencies: list[float] = []
+        errors = 0
+
+        async def worker(record_after: float, stop_at: float):
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                try:
+                    ok = await http_request(session, base_url, scenario, users)
+                except (ClientError, asyncio.TimeoutError):
+                    ok = False
+                if time.monotonic() < record_after:
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if not ok:
+                    errors += 1
+
+        started = time.monotonic()
+        record_after = started + warmup
+        stop_at = record_after + duration
+        await asyncio.gather(
+            *(worker(record_after, stop_at) for _ in range(concurrency))
+        )
+        elapsed = time.monotonic() - max(record_after, started)
+
+    return summarize(scenario, latencies, errors, elapsed, concurrency)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_text(self, data: str):
+        self.sent += 1
+        await asyncio.sleep(0)
+
+
+async def run_progress_scenario(
+    concurrency: int, duration: float, users: int, redis_mode: str
+) -> dict:
+    """
+    WebSocket-эндпоинта в сервисе нет, поэтому измеряется сам проход рассылки:
+    users пользователей по concurrency подписчиков у каждого.
+    """
+    from app.main import broadcast_progress_once
+    from app.services.redisClient import redis_client_async
+    from app.settings import settings
+
+    if redis_mode == "fake":
+        import fakeredis
+
+        redis_client_async._redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    else:
+        await redis_client_async.connect()
+
+    namespace = settings.REDIS_DATA_COLLECTION_GOOGLE_FITNESS_API_PROGRESS_BAR_NAMESPACE
+    clients = {}
+    for n in range(users):
+        email = f"bench{n}@bench.local"
+        await redis_client_async.set(
+            f"{namespace}{email}", json.dumps({"progress": "50", "email": email})
+        )
+        clients[email] = {FakeWebSocket() for _ in range(concurrency)}
+
+    latencies = []
+    started = time.monotonic()
+    while time.monotonic() - started < duration:
+        start = time.perf_counter()
+        await broadcast_progress_once(namespace, clients)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.monotonic() - started
+
+    await redis_client_async.disconnect()
+    result = summarize("progress", latencies, 0, elapsed, concurrency)
+    result["sends_per_round"] = users * concurrency
+    return result
+
+
+def print_results(results: list[dict], baseline: dict | None = None) -> None:
+    previous = {r["scenario"]: r for r in (baseline or {}).get("results", [])}
+    print(
+        f"{'scenario':<10}{'conc':>6}{'reqs':>9}{'err':>6}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['scenario']:<10}{r['concurrency']:>6}{r['requests']:>9}{r['errors']:>6}"
+            f"{r['rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+        )
+        old = previous.get(r["scenario"])
+        if old:
+            deltas = [
+                f"{key}: {(r[key] - old[key]) / old[key] * 100:+.1f}%"
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+                if old[key]
+            ]
+            print(f"{'':<10}vs {baseline.get('label') or 'baseline'}: {', '.join(deltas)}")
+
+
+async def run(args) -> list[dict]:
+    results = []
+    for scenario in args.scenarios:
+        if scenario == "progress":
+            results.append(
+                await run_progress_scenario(
+                    args.concurrency, args.duration, args.users, args.redis
+                )
+            )
+        else:
+            results.append(
+                await run_http_scenario(
+                    args.base_url,
+                    scenario,
+                    args.concurrency,
+                    args.duration,
+                    args.warmup,
+                    args.users,
+                )
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на сценарий")
+    parser.add_argument("--warmup", type=float, default=2.0, help="секунд прогрева")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--redis", choices=["fake", "real"], default="fake")
+    parser.add_argument(
+        "--db-url",
+        default=None,
+        help="URL БД (например, эфемерной Postgres); по умолчанию временная SQLite",
+    )
+    parser.add_argument("--auth-latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="нагружать уже запущенный экземпляр вместо локального",
+    )
+    parser.add_argument("--app-port", type=int, default=18080)
+    parser.add_argument("--auth-port", type=int, default=18081)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    args = parser.parse_args()
+
+    processes = []
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        if args.base_url is None:
+            auth_url = f"http://127.0.0.1:{args.auth_port}"
+            env = {
+                **os.environ,
+                "DB_URL": args.db_url or f"sqlite+aiosqlite:///{tmpdir.name}/bench.db",
+                "AUTH_API_URL": auth_url,
+                "LOKI_URL": f"{auth_url}/loki/api/v1/push",
+                "OTLP_GRPC_ENDPOINT": "127.0.0.1:4317",
+            }
+            processes.append(
+                start_process(
+                    "benchmarks.fakes",
+                    ["--port", str(args.auth_port), "--latency-ms", str(args.auth_latency_ms)],
+                    env,
+                )
+            )
+            processes.append(
+                start_process(
+                    "benchmarks.serve",
+                    ["--port", str(args.app_port), "--redis", args.redis],
+                    env,
+                )
+            )
+            args.base_url = f"http://127.0.0.1:{args.app_port}"
+            asyncio.run(wait_for_http(f"{auth_url}/", 30))
+            asyncio.run(wait_for_http(f"{args.base_url}/health/live", 60))
+
+        results = asyncio.run(run(args))
+    finally:
+        stop_processes(processes)
+        tmpdir.cleanup()
+
+    config = {key: value for key, value in vars(args).items() if key != "compare"}
+    report = make_report("load_test", args.label, config, results)
+    print_results(results, load_results(args.compare))
+    print(f"Результаты сохранены в {save_results(report, args.label)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Запускает app.main:app для бенчмарков. Адреса БД, Auth API и Loki задаются
+через окружение (DB_URL, AUTH_API_URL, LOKI_URL) — так делает
+benchmarks.load_test. Таблицы создаются перед стартом.
+
+Запуск:
+    DB_URL=sqlite+aiosqlite:///bench.db AUTH_API_URL=http://127.0.0.1:18081 \\
+        python -m benchmarks.serve --port 18080 --redis fake
+"""
+
+import argparse
+import asyncio
+
+import uvicorn
+
+from app.services.db.engine import db_engine
+from app.services.db.schemas import Base
+from app.services.redisClient import redis_client_async
+from app.settings import settings
+
+
+async def create_tables():
+    async with db_engine.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await db_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument(
+        "--redis",
+        choices=["fake", "real"],
+        default="fake",
+        help="fake — fakeredis в процессе, real — Redis по REDIS_HOST/REDIS_PORT",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(create_tables())
+
+    if args.redis == "fake":
+        import fakeredis
+
+        # connect() ничего не делает, если клиент уже задан
+        redis_client_async._redis = fakeredis.aioredis.FakeRedis(
+            decode_responses=True
+        )
+
+    from app.main import app
+
+    uvicorn.run(
+        app,
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning",
+        access_log=False,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
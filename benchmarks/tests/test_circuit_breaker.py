@@ -0,0 +1,99 @@
+"""
+Переходы CircuitBreaker без внешних сервисов; время подменяется.
+
+Запуск:
+    python -m unittest discover -s benchmarks/tests -t .
+"""
+
+import unittest
+from unittest import mock
+
+from app.services.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("app.services.circuit_breaker.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(
+            "test",
+            failure_rate_threshold=0.5,
+            window=4,
+            min_calls=4,
+            open_seconds=10.0,
+            trial_timeout=5.0,
+        )
+
+    def open_breaker(self):
+        for _ in range(4):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_opens_on_failure_rate(self):
+        for _ in range(2):
+            self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_half_open_allows_single_trial(self):
+        self.open_breaker()
+        self.clock.now += 10.0
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        self.clock.now += 10.0
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_trial_slot_expires_after_trial_timeout(self):
+        self.open_breaker()
+        self.clock.now += 10.0
+        self.assertTrue(self.breaker.allow_request())
+
+        self.clock.now += 4.9
+        self.assertFalse(self.breaker.allow_request())
+        self.clock.now += 0.1
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_release_trial_frees_slot_without_outcome(self):
+        self.open_breaker()
+        self.clock.now += 10.0
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.release_trial()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_release_trial_records_nothing_when_closed(self):
+        for _ in range(10):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.release_trial()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(len(self.breaker._results), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
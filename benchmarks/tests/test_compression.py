@@ -0,0 +1,139 @@
+"""
+Выбор кодировки по Accept-Encoding и буферизация CompressionMiddleware
+до порога minimum_size.
+
+Запуск:
+    python -m unittest discover -s benchmarks/tests -t .
+"""
+
+import gzip
+import unittest
+
+from starlette.types import Message
+
+from app.services.compression import CompressionMiddleware, choose_encoding
+
+SUPPORTED = ["br", "zstd", "gzip"]
+
+
+class ChooseEncodingTest(unittest.TestCase):
+    def test_prefers_server_order_on_equal_q(self):
+        self.assertEqual(choose_encoding("gzip, br", SUPPORTED), "br")
+
+    def test_highest_q_wins(self):
+        self.assertEqual(choose_encoding("br;q=0.5, gzip;q=0.8", SUPPORTED), "gzip")
+
+    def test_q_zero_forbids_encoding(self):
+        self.assertEqual(choose_encoding("br;q=0, gzip", SUPPORTED), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0", ["gzip"]))
+
+    def test_wildcard(self):
+        self.assertEqual(choose_encoding("*", SUPPORTED), "br")
+        self.assertEqual(choose_encoding("*;q=0.1, br;q=0", SUPPORTED), "zstd")
+        self.assertIsNone(choose_encoding("*;q=0", SUPPORTED))
+
+    def test_no_acceptable_encoding(self):
+        self.assertIsNone(choose_encoding("", SUPPORTED))
+        self.assertIsNone(choose_encoding("identity", SUPPORTED))
+        self.assertIsNone(choose_encoding("gzip;q=abc", ["gzip"]))
+
+
+def start_message(content_type: str = "application/json") -> Message:
+    return {
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", content_type.encode())],
+    }
+
+
+def body_message(body: bytes, more_body: bool = False) -> Message:
+    return {"type": "http.response.body", "body": body, "more_body": more_body}
+
+
+class CompressionMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def run_app(
+        self, messages: list[Message], minimum_size: int = 100
+    ) -> list[Message]:
+        async def app(scope, receive, send):
+            for message in messages:
+                await send(message)
+
+        sent = []
+
+        async def send(message: Message):
+            sent.append(message)
+
+        middleware = CompressionMiddleware(app, minimum_size=minimum_size)
+        # gzip есть всегда, brotli и zstd — только если установлены пакеты
+        middleware.encoders = {"gzip": middleware.encoders["gzip"]}
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "headers": [(b"accept-encoding", b"gzip")],
+        }
+        await middleware(scope, None, send)
+        return sent
+
+    def headers(self, message: Message) -> dict[bytes, bytes]:
+        return dict(message["headers"])
+
+    async def test_small_streamed_response_is_not_compressed(self):
+        sent = await self.run_app(
+            [start_message(), body_message(b"a" * 40, True), body_message(b"b" * 40)]
+        )
+        self.assertEqual(
+            [m["type"] for m in sent], ["http.response.start", "http.response.body"]
+        )
+        self.assertNotIn(b"content-encoding", self.headers(sent[0]))
+        self.assertEqual(sent[1]["body"], b"a" * 40 + b"b" * 40)
+
+    async def test_buffers_until_threshold_then_streams_compressed(self):
+        chunks = [b"a" * 60, b"b" * 60, b"c" * 60, b"d" * 60]
+        sent = await self.run_app(
+            [start_message()]
+            + [body_message(chunk, True) for chunk in chunks[:-1]]
+            + [body_message(chunks[-1])]
+        )
+        self.assertEqual(sent[0]["type"], "http.response.start")
+        self.assertEqual(self.headers(sent[0])[b"content-encoding"], b"gzip")
+        self.assertIn(b"accept-encoding", self.headers(sent[0])[b"vary"].lower())
+
+        bodies = sent[1:]
+        # первые 60 байт меньше порога и ждут в буфере; дальше каждый кусок
+        # отправляется сразу
+        self.assertEqual(len(bodies), 3)
+        self.assertTrue(all(m["more_body"] for m in bodies[:-1]))
+        self.assertFalse(bodies[-1]["more_body"])
+        self.assertEqual(
+            gzip.decompress(b"".join(m["body"] for m in bodies)), b"".join(chunks)
+        )
+
+    async def test_content_length_below_threshold_passes_through(self):
+        start = start_message()
+        start["headers"].append((b"content-length", b"10"))
+        sent = await self.run_app([start, body_message(b"0123456789")])
+        self.assertIs(sent[0], start)
+        self.assertEqual(sent[1]["body"], b"0123456789")
+
+    async def test_not_compressible_content_type_passes_through(self):
+        body = b"x" * 500
+        sent = await self.run_app([start_message("image/png"), body_message(body)])
+        self.assertNotIn(b"content-encoding", self.headers(sent[0]))
+        self.assertEqual(sent[1]["body"], body)
+
+    async def test_non_body_message_flushes_buffered_start_first(self):
+        pathsend = {"type": "http.response.pathsend", "path": "/tmp/file"}
+        sent = await self.run_app(
+            [start_message(), body_message(b"a" * 10, True), pathsend]
+        )
+        self.assertEqual(
+            [m["type"] for m in sent],
+            ["http.response.start", "http.response.body", "http.response.pathsend"],
+        )
+        self.assertNotIn(b"content-encoding", self.headers(sent[0]))
+        self.assertEqual(sent[1]["body"], b"a" * 10)
+        self.assertTrue(sent[1]["more_body"])
+
+
+if __name__ == "__main__":
+    unittest.main()
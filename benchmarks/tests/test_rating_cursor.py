@@ -0,0 +1,85 @@
+"""
+Курсоры админского списка оценок: кодирование и отказ на чужих курсорах.
+
+Запуск:
+    python -m unittest discover -s benchmarks/tests -t .
+"""
+
+import base64
+import string
+import unittest
+
+from fastapi import HTTPException
+
+from app.api.v1.rating import (
+    ORDER_BY_EMAIL,
+    ORDER_BY_ID,
+    ORDER_BY_VALUE,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def raw_cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+class RatingCursorTest(unittest.TestCase):
+    def assertRejected(self, cursor: str, order: str):
+        with self.assertRaises(HTTPException) as ctx:
+            decode_cursor(cursor, order)
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_round_trip_by_id(self):
+        cursor = encode_cursor(ORDER_BY_ID, 42)
+        self.assertEqual(decode_cursor(cursor, ORDER_BY_ID), (42, None))
+
+    def test_round_trip_by_value(self):
+        for value in (1.0, 3.7, 0.1 + 0.2, 5.0):
+            cursor = encode_cursor(ORDER_BY_VALUE, 7, value)
+            self.assertEqual(decode_cursor(cursor, ORDER_BY_VALUE), (7, value))
+
+    def test_round_trip_by_email(self):
+        emails = ("user@example.com", '"a:b"@example.com', "пользователь@пример.рф")
+        for email in emails:
+            cursor = encode_cursor(ORDER_BY_EMAIL, 9, email)
+            self.assertEqual(decode_cursor(cursor, ORDER_BY_EMAIL), (9, email))
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(ORDER_BY_EMAIL, 1, "a+b/c?d@example.com")
+        self.assertNotIn("=", cursor)
+        alphabet = string.ascii_letters + string.digits + "-_"
+        self.assertTrue(set(cursor) <= set(alphabet))
+
+    def test_rejects_other_version(self):
+        self.assertRejected(raw_cursor("v1:5"), ORDER_BY_ID)
+        self.assertRejected(raw_cursor("v1:5:3.0"), ORDER_BY_VALUE)
+        self.assertRejected(raw_cursor("v3:id:5"), ORDER_BY_ID)
+
+    def test_rejects_other_order(self):
+        cursor = encode_cursor(ORDER_BY_ID, 5)
+        self.assertRejected(cursor, ORDER_BY_VALUE)
+        self.assertRejected(cursor, ORDER_BY_EMAIL)
+        self.assertRejected(encode_cursor(ORDER_BY_VALUE, 5, 3.0), ORDER_BY_ID)
+
+    def test_rejects_non_finite_value(self):
+        for value in ("nan", "inf", "-inf", "NaN", "infinity"):
+            self.assertRejected(raw_cursor(f"v2:value:5:{value}"), ORDER_BY_VALUE)
+
+    def test_rejects_malformed(self):
+        for cursor in (
+            "",
+            "not base64!",
+            raw_cursor("v2:id"),
+            raw_cursor("v2:id:x"),
+            raw_cursor("v2:id:5:extra"),
+            raw_cursor("v2:value:5"),
+            raw_cursor("v2:value:5:abc"),
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        ):
+            self.assertRejected(cursor, ORDER_BY_ID)
+            self.assertRejected(cursor, ORDER_BY_VALUE)
+
+
+if __name__ == "__main__":
+    unittest.main()
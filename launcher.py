@@ -1,9 +1,182 @@
+import math
+import os
+import importlib.util
+import shutil
+import tempfile
+
 import uvicorn
 from app.settings import settings
 
-uvicorn.run(
-    "app.main:app",
-    host="0.0.0.0",
-    port=settings.PORT,
-    log_level=str(settings.LOG_LEVEL).lower(),
-)
+APP = "app.main:app"
+
+
+def cgroup_cpu_limit() -> float | None:
+    """
+    Квота CPU контейнера из cgroup (v2, затем v1) или None, если она не задана.
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def worker_count() -> int:
+    if settings.WORKERS:
+        return settings.WORKERS
+    return available_cpus()
+
+
+def prepare_multiprocess_metrics(workers: int) -> None:
+    """
+    С несколькими воркерами метрики Prometheus живут в отдельном процессе
+    каждого воркера, и /metrics отдавал бы метрики случайного из них.
+    Воркеры пишут значения в файлы PROMETHEUS_MULTIPROC_DIR, откуда их
+    собирает app.services.utils.metrics. Переменная должна быть задана до
+    импорта prometheus_client воркерами, а каталог очищен при каждом старте.
+    """
+    if workers <= 1:
+        return
+
+    directory = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR",
+        os.path.join(tempfile.gettempdir(), "prometheus-multiproc"),
+    )
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def uvicorn_options() -> dict:
+    return {
+        "loop": event_loop(),
+        "http": http_protocol(),
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+    }
+
+
+def run_dev():
+    uvicorn.run(
+        APP,
+        host="0.0.0.0",
+        port=settings.PORT,
+        log_level=str(settings.LOG_LEVEL).lower(),
+    )
+
+
+def run_uvicorn():
+    prepare_multiprocess_metrics(worker_count())
+    uvicorn.run(
+        APP,
+        host="0.0.0.0",
+        port=settings.PORT,
+        log_level=str(settings.LOG_LEVEL).lower(),
+        workers=worker_count(),
+        proxy_headers=True,
+        **uvicorn_options(),
+    )
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": event_loop(),
+            "http": http_protocol(),
+            "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+            "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+        }
+
+    def child_exit(server, worker):
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            from prometheus_client import multiprocess
+
+            multiprocess.mark_process_dead(worker.pid)
+
+    prepare_multiprocess_metrics(worker_count())
+
+    class GunicornApplication(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # При выключенном preload_app вызывается уже в воркере после fork
+            from app.main import app
+
+            return app
+
+    GunicornApplication(
+        {
+            "bind": f"0.0.0.0:{settings.PORT}",
+            "workers": worker_count(),
+            # worker_class указывается объектом: класс определён локально
+            "worker_class": TunedUvicornWorker,
+            "backlog": settings.SERVER_BACKLOG,
+            "keepalive": settings.SERVER_KEEPALIVE_TIMEOUT,
+            "graceful_timeout": settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+            "loglevel": str(settings.LOG_LEVEL).lower(),
+            # app.main импортируется в каждом воркере после fork, поэтому
+            # клиент Redis, пул БД и фоновые задачи создаются отдельно для
+            # каждого процесса. Словари WebSocket-клиентов из app.settings
+            # на момент fork пусты и дальше живут независимо в каждом воркере.
+            "preload_app": False,
+            "child_exit": child_exit,
+        }
+    ).run()
+
+
+if __name__ == "__main__":
+    if not settings.PRODUCTION:
+        run_dev()
+    elif settings.SERVER_MANAGER == "gunicorn":
+        run_gunicorn()
+    else:
+        run_uvicorn()